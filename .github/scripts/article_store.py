@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+News Article Store
+SQLite history of every relevant article seen by the news scripts, upserted
+incrementally each run and queried for rendering
+
+Ad-hoc queries:
+    python .github/scripts/article_store.py --db .cache/cra-news/wiki-articles.sqlite3 --source "*ENISA*" --text "Annex III"
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+from canonical_urls import url_key
+from news_state import STATE_DIRECTORY
+
+ARTICLE_FIELDS = ('title', 'link', 'date', 'summary', 'source')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    fingerprint TEXT NOT NULL UNIQUE,
+    canonical_url TEXT,
+    title TEXT NOT NULL,
+    link TEXT,
+    date TEXT NOT NULL,
+    summary TEXT,
+    source TEXT,
+    content_hash TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_articles_canonical_url ON articles (canonical_url);
+CREATE INDEX IF NOT EXISTS idx_articles_source ON articles (source);
+CREATE INDEX IF NOT EXISTS idx_articles_date ON articles (date DESC);
+"""
+
+def canonical_url(url):
+    """Host, path and meaningful query of a link, or None for placeholder links"""
+    return url_key(url)
+
+def article_fingerprint(article):
+    """Stable identity of an article: its canonical URL, or its source and title without one"""
+    key = canonical_url(article.get('link'))
+    if key is None:
+        key = f"{article.get('source', '')}|{' '.join(article.get('title', '').lower().split())}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+def content_hash(article):
+    """Hash of the rendered fields, used to skip writes for unchanged articles"""
+    payload = '\x1f'.join(str(article.get(field) or '') for field in ARTICLE_FIELDS)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+class ArticleStore:
+    """Article history in a WAL-mode SQLite database"""
+
+    def __init__(self, filename='articles.sqlite3', directory=None):
+        self.path = os.path.join(directory or STATE_DIRECTORY, filename)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+
+    def upsert(self, articles):
+        """Insert new articles and rewrite changed ones; returns (inserted, updated) counts"""
+        rows = {}
+        for article in articles:
+            if not article.get('title') or not article.get('date'):
+                continue
+            rows[article_fingerprint(article)] = article
+
+        if not rows:
+            return 0, 0
+
+        existing = {}
+        fingerprints = list(rows)
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(fingerprints), 500):
+            batch = fingerprints[start:start + 500]
+            placeholders = ','.join('?' * len(batch))
+            for row in self.connection.execute(
+                    f"SELECT fingerprint, content_hash FROM articles WHERE fingerprint IN ({placeholders})", batch):
+                existing[row['fingerprint']] = row['content_hash']
+
+        now = datetime.now().isoformat()
+        inserts = []
+        updates = []
+        for fingerprint, article in rows.items():
+            digest = content_hash(article)
+            values = [article.get(field) for field in ARTICLE_FIELDS]
+            if fingerprint not in existing:
+                inserts.append([fingerprint, canonical_url(article.get('link'))] + values + [digest, now, now])
+            elif existing[fingerprint] != digest:
+                updates.append(values + [digest, now, fingerprint])
+
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO articles (fingerprint, canonical_url, title, link, date, summary, source, "
+                "content_hash, first_seen, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", inserts)
+            self.connection.executemany(
+                "UPDATE articles SET title = ?, link = ?, date = ?, summary = ?, source = ?, "
+                "content_hash = ?, updated_at = ? WHERE fingerprint = ?", updates)
+        return len(inserts), len(updates)
+
+    def query(self, limit=None, source=None, text=None, since=None):
+        """Newest articles first, optionally filtered by source glob, text and earliest date"""
+        clauses = []
+        params = []
+        if source:
+            clauses.append('source GLOB ?')
+            params.append(source)
+        if text:
+            clauses.append("(title LIKE ? ESCAPE '\\' OR summary LIKE ? ESCAPE '\\')")
+            pattern = '%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            params.extend([pattern, pattern])
+        if since:
+            clauses.append('date >= ?')
+            params.append(since)
+
+        sql = f"SELECT {', '.join(ARTICLE_FIELDS)} FROM articles"
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY date DESC, id DESC'
+        if limit:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        return [dict(row) for row in self.connection.execute(sql, params)]
+
+    def count(self):
+        """Number of stored articles"""
+        return self.connection.execute('SELECT COUNT(*) FROM articles').fetchone()[0]
+
+    def close(self):
+        """Fold the WAL back into the main file so a cached copy is self-contained"""
+        self.connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        self.connection.close()
+
+def main():
+    """Print stored articles matching the given filters"""
+    parser = argparse.ArgumentParser(description='Query the CRA news article store')
+    parser.add_argument('--db', default=os.path.join(STATE_DIRECTORY, 'wiki-articles.sqlite3'),
+                        help='article database to query')
+    parser.add_argument('--source', help='source name glob, e.g. "*ENISA*"')
+    parser.add_argument('--text', help='text that must appear in the title or summary')
+    parser.add_argument('--since', help='earliest date (YYYY-MM-DD)')
+    parser.add_argument('--limit', type=int, default=50, help='maximum rows to print')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"No article store at {args.db}")
+        sys.exit(1)
+
+    store = ArticleStore(os.path.abspath(args.db))
+    articles = store.query(limit=args.limit, source=args.source, text=args.text, since=args.since)
+    for article in articles:
+        print(f"{article['date']}  {article.get('source') or 'Unknown':<28} {article['title']}")
+        print(f"            {article.get('link') or ''}")
+    print(f"{len(articles)} of {store.count()} stored articles")
+    store.close()
+
+if __name__ == "__main__":
+    main()
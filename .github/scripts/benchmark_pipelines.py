@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Fetch Pipeline Benchmarks
+Offline benchmarks for the document download, news fetch, dedup and render stages,
+run against the local stand-in server from replay_harness
+
+Usage:
+    python .github/scripts/benchmark_pipelines.py --json bench.json
+    python .github/scripts/benchmark_pipelines.py --baseline bench.json --tolerance 0.25
+    python .github/scripts/benchmark_pipelines.py --cassette .github/scripts/cassettes/news.json --stages fetch
+"""
+
+import argparse
+import contextlib
+import email.utils
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+STAGES = ['download', 'download_revalidate', 'fetch', 'dedup', 'render']
+
+def synthetic_articles(count, seed=42):
+    """Articles with realistic overlap: reposted titles, tracking parameters and unrelated items"""
+    rng = random.Random(seed)
+    subjects = ['Cyber Resilience Act', 'CRA', 'EU cybersecurity rules', 'ENISA guidance', 'Annex III products',
+                'vulnerability reporting', 'conformity assessment', 'harmonised standards']
+    verbs = ['update', 'explained', 'enters into force', 'deadline approaches', 'draft published',
+             'consultation opens', 'what manufacturers must know']
+    publishers = ['Security Week', 'Google News (Reuters)', 'Google News (Euractiv)', 'EU Official', 'ENISA']
+    now = datetime.now()
+    articles = []
+    for i in range(count):
+        if articles and rng.random() < 0.3:
+            # Near-duplicate of an earlier article from another outlet
+            original = rng.choice(articles)
+            title = original['title'] + rng.choice(['', ' - Reuters', ' | Euractiv', '!'])
+            link = original['link'] + f"?utm_source=feed{i}"
+        else:
+            title = f"{rng.choice(subjects)} {rng.choice(verbs)} ({i})"
+            link = f"https://news{rng.randint(1, 20)}.example.com/articles/{i}"
+        articles.append({
+            'title': title,
+            'link': link,
+            'date': (now - timedelta(days=rng.randint(0, 29))).strftime('%Y-%m-%d'),
+            'summary': f"{title}. " + ' '.join(rng.choice(subjects + verbs) for _ in range(20)),
+            'source': rng.choice(publishers)
+        })
+    return articles
+
+def synthetic_rss(count, seed=7):
+    """An RSS 2.0 feed in which roughly half the items mention the CRA"""
+    rng = random.Random(seed)
+    now = datetime.now()
+    items = []
+    for i in range(count):
+        topic = rng.choice(['Cyber Resilience Act obligations', 'EU cybersecurity certification',
+                            'Ransomware gang leaks data', 'Patch Tuesday roundup'])
+        published = email.utils.format_datetime(now - timedelta(hours=i * 3))
+        items.append(f"<item><title>{topic} #{i}</title><link>https://www.securityweek.example/{i}</link>"
+                     f"<description>{topic} story {i}</description><pubDate>{published}</pubDate></item>")
+    return ('<?xml version="1.0"?><rss version="2.0"><channel><title>Bench</title>'
+            + ''.join(items) + '</channel></rss>').encode('utf-8')
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def _download_setup(options, server):
+    from download_official_docs import CRADocumentDownloader
+
+    documents = {}
+    for i in range(options['documents']):
+        body = b'%PDF-1.7\n' + random.Random(i).randbytes(options['document_size'])
+        url = server.add_route(f"/doc/{i}.pdf", body, content_type='application/pdf', latency=options['latency'])
+        documents[f"bench_doc_{i}"] = {'url': url, 'filename': f"bench-{i}.pdf",
+                                       'title': f"Benchmark document {i}", 'type': 'guidance'}
+    catalog_file = os.path.join(os.getcwd(), 'bench-catalog.json')
+    with open(catalog_file, 'w', encoding='utf-8') as f:
+        json.dump({'folders': {'guidance': 'guidance'}, 'default_folder': 'standards', 'documents': documents}, f)
+    return lambda: CRADocumentDownloader(catalog_file=catalog_file).run()
+
+def _stage_download(options, server):
+    run = _download_setup(options, server)
+
+    def iteration():
+        # A cold run: nothing on disk, every document is fetched in full
+        if os.path.exists('docs'):
+            import shutil
+            shutil.rmtree('docs')
+        run()
+    return iteration
+
+def _stage_download_revalidate(options, server):
+    run = _download_setup(options, server)
+    run()
+    # Steady state: every document answers 304 Not Modified
+    return run
+
+def _stage_fetch(options, server):
+    from fetch_cra_news import CRANewsFetcher
+    from update_wiki_news import WikiNewsUpdater
+
+    fetcher = CRANewsFetcher()
+    updater = WikiNewsUpdater()
+
+    if options.get('cassette'):
+        from replay_harness import Cassette
+        cassette = Cassette(options['cassette']).load()
+        urls = server.add_cassette(cassette)
+        targets = []
+        for original_url, local_url in urls.items():
+            content_type = cassette.interactions[('GET', original_url)][-1]['headers'].get('Content-Type', '')
+            targets.append((local_url, 'web' if 'html' in content_type else 'rss'))
+    else:
+        url = server.add_route('/feed', synthetic_rss(options['feed_items']),
+                               content_type='application/rss+xml', latency=options['latency'], etag=False)
+        targets = [(url, 'rss')]
+
+    def iteration():
+        for url, kind in targets:
+            if kind == 'web':
+                fetcher.fetch_web_content(url)
+            else:
+                fetcher.fetch_rss_news(url)
+                updater.fetch_rss_news(url)
+    return iteration
+
+def _stage_dedup(options, server):
+    from update_wiki_news import WikiNewsUpdater
+
+    updater = WikiNewsUpdater()
+    articles = synthetic_articles(options['articles'])
+    return lambda: updater.deduplicate_articles([dict(article) for article in articles])
+
+def _stage_render(options, server):
+    from fetch_cra_news import CRANewsFetcher
+    from update_wiki_news import WikiNewsUpdater
+
+    fetcher = CRANewsFetcher()
+    updater = WikiNewsUpdater()
+    articles = synthetic_articles(options['articles'])
+
+    def iteration():
+        updater.generate_wiki_content([dict(article) for article in articles])
+        fetcher.generate_markdown_update([dict(article) for article in articles])
+    return iteration
+
+STAGE_FACTORIES = {
+    'download': _stage_download,
+    'download_revalidate': _stage_download_revalidate,
+    'fetch': _stage_fetch,
+    'dedup': _stage_dedup,
+    'render': _stage_render
+}
+
+def run_stage(stage, options):
+    """Run one stage in the current (fresh) process and return its measurements"""
+    from replay_harness import StandInServer
+
+    work_dir = tempfile.mkdtemp(prefix=f"cra-bench-{stage}-")
+    os.chdir(work_dir)
+    latencies = []
+    with StandInServer() as server, open(os.devnull, 'w') as devnull:
+        with contextlib.redirect_stdout(devnull):
+            iteration = STAGE_FACTORIES[stage](options, server)
+            iteration()  # warm-up
+            started = time.perf_counter()
+            for _ in range(options['iterations']):
+                iteration_started = time.perf_counter()
+                iteration()
+                latencies.append((time.perf_counter() - iteration_started) * 1000)
+            elapsed = time.perf_counter() - started
+
+    return {
+        'stage': stage,
+        'runs': len(latencies),
+        'runs_per_second': round(len(latencies) / elapsed, 3) if elapsed else None,
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        # ru_maxrss is reported in kilobytes on Linux
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+
+def run_benchmarks(stages, options):
+    """Run each stage in its own process so peak RSS is attributed to that stage alone"""
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for stage in stages:
+        print(f"Benchmarking {stage}...")
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            results.append(executor.submit(run_stage, stage, options).result())
+    return results
+
+def compare_to_baseline(results, baseline, tolerance, min_delta_ms):
+    """Return the stages whose p50 latency regressed by more than the tolerance"""
+    baseline_by_stage = {entry['stage']: entry for entry in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        previous = baseline_by_stage.get(result['stage'])
+        # Sub-millisecond stages are too noisy for a purely relative threshold
+        if (previous and result['p50_ms'] > previous['p50_ms'] * (1 + tolerance)
+                and result['p50_ms'] - previous['p50_ms'] > min_delta_ms):
+            regressions.append(f"{result['stage']}: p50 {previous['p50_ms']:.1f}ms -> {result['p50_ms']:.1f}ms")
+    return regressions
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description='Benchmark the CRA fetch pipelines offline')
+    parser.add_argument('--stages', default=','.join(STAGES),
+                        help=f"comma-separated stages to run (default: {','.join(STAGES)})")
+    parser.add_argument('--iterations', type=int, default=5, help='measured runs per stage')
+    parser.add_argument('--documents', type=int, default=12, help='documents served to the download stages')
+    parser.add_argument('--document-size', type=int, default=256 * 1024, help='bytes per benchmark document')
+    parser.add_argument('--feed-items', type=int, default=200, help='items in the synthetic RSS feed')
+    parser.add_argument('--articles', type=int, default=300, help='articles fed to the dedup and render stages')
+    parser.add_argument('--latency', type=float, default=0.05, help='injected server latency in seconds')
+    parser.add_argument('--cassette', help='replay recorded responses in the fetch stage instead of synthetic RSS')
+    parser.add_argument('--json', dest='json_file', help='write results to this JSON file')
+    parser.add_argument('--baseline', help='JSON results from an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed fractional p50 slowdown against the baseline')
+    parser.add_argument('--min-delta-ms', type=float, default=5.0,
+                        help='ignore p50 slowdowns smaller than this many milliseconds')
+    return parser.parse_args()
+
+def main():
+    """Main execution"""
+    args = parse_args()
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGE_FACTORIES]
+    if unknown:
+        print(f"Unknown stages: {', '.join(unknown)}")
+        sys.exit(2)
+
+    options = {
+        'iterations': args.iterations,
+        'documents': args.documents,
+        'document_size': args.document_size,
+        'feed_items': args.feed_items,
+        'articles': args.articles,
+        'latency': args.latency,
+        'cassette': os.path.abspath(args.cassette) if args.cassette else None
+    }
+    results = run_benchmarks(stages, options)
+
+    print(f"\n{'Stage':<22}{'Runs':>6}{'Runs/s':>10}{'p50 ms':>12}{'p99 ms':>12}{'Peak RSS MB':>14}")
+    for result in results:
+        print(f"{result['stage']:<22}{result['runs']:>6}{result['runs_per_second']:>10.2f}"
+              f"{result['p50_ms']:>12.1f}{result['p99_ms']:>12.1f}{result['peak_rss_mb']:>14.1f}")
+
+    if args.json_file:
+        with open(args.json_file, 'w', encoding='utf-8') as f:
+            json.dump({'created_at': datetime.now().isoformat(), 'options': options, 'results': results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare_to_baseline(results, json.load(f), args.tolerance, args.min_delta_ms)
+        if regressions:
+            print("\nPerformance regressions detected:")
+            for regression in regressions:
+                print(f"- {regression}")
+            sys.exit(1)
+        print("\nNo regressions against baseline")
+
+if __name__ == "__main__":
+    main()
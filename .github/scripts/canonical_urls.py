@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Canonical News URLs
+Tracking-parameter stripping, AMP/mobile/www host folding and offline decoding
+of Google News links, with decoded links kept in a persistent LRU/TTL cache
+"""
+
+import base64
+import binascii
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+from news_state import STATE_DIRECTORY
+
+# Query parameters that only identify the campaign or referrer, never the page
+TRACKING_PARAMETERS = frozenset([
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'ocid', 'cmpid', 'ncid', 'icid',
+    'ref', 'ref_src', 'referrer', 'guccounter', 'guce_referrer', 'guce_referrer_sig',
+    '_hsenc', '_hsmi', 'oc', 'ved', 'usg', 'amp', 'outputtype'
+])
+TRACKING_PREFIXES = ('utm_', 'pk_', 'mtm_', 'at_')
+
+# Host prefixes serving the same articles as the bare domain
+_HOST_VARIANT = re.compile(r'^(?:www\d*|m|mobile|amp)\.(?=[^.]+\.[^.]+)')
+# AMP copies: /amp, /amp/, /amp.html or a trailing .amp before the extension
+_AMP_PATH = re.compile(r'(?:/amp(?:\.html?)?/?$)|(?:\.amp(?=\.html?$))|(?:^/amp(?=/))')
+
+GNEWS_HOSTS = frozenset(['news.google.com'])
+_GNEWS_ARTICLE = re.compile(r'/(?:rss/)?articles/([A-Za-z0-9_-]+)')
+
+def is_tracking_parameter(name):
+    """Whether a query parameter is campaign or referrer noise"""
+    name = name.lower()
+    return name in TRACKING_PARAMETERS or name.startswith(TRACKING_PREFIXES)
+
+def strip_tracking(url):
+    """The URL without tracking parameters or fragment, otherwise unchanged"""
+    if not url or url == '#':
+        return url
+    parsed = urlparse(url)
+    if parsed.netloc.lower() in GNEWS_HOSTS:
+        # Google News keeps the article id in the path but needs no query either
+        return urlunparse(parsed._replace(query='', fragment=''))
+    parameters = parse_qsl(parsed.query, keep_blank_values=True)
+    kept = [(name, value) for name, value in parameters if not is_tracking_parameter(name)]
+    query = parsed.query if len(kept) == len(parameters) else urlencode(kept)
+    return urlunparse(parsed._replace(query=query, fragment=''))
+
+def url_key(url):
+    """Host, path and remaining query of a link, lower-cased with host and AMP variants folded"""
+    if not url or url == '#':
+        return None
+    parsed = urlparse(strip_tracking(url.strip()))
+    host = parsed.netloc.lower()
+    if host.endswith(':80') or host.endswith(':443'):
+        host = host.rsplit(':', 1)[0]
+    host = _HOST_VARIANT.sub('', host)
+    path = _AMP_PATH.sub('', parsed.path.lower()).rstrip('/')
+    query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+    key = f"{host}{path}" + (f"?{query}" if query else '')
+    return key.lower() or None
+
+def decode_gnews_url(url):
+    """Publisher URL embedded in an older-style Google News article id, if any"""
+    match = _GNEWS_ARTICLE.search(urlparse(url).path)
+    if not match:
+        return None
+    article_id = match.group(1)
+    try:
+        decoded = base64.urlsafe_b64decode(article_id + '=' * (-len(article_id) % 4))
+    except (binascii.Error, ValueError):
+        return None
+    # Protobuf: field 1 (varint) then field 4 (length-delimited) holding the URL
+    prefix = b'\x08\x13\x22'
+    if not decoded.startswith(prefix):
+        return None
+    position, length, shift = len(prefix), 0, 0
+    while position < len(decoded):
+        byte = decoded[position]
+        position += 1
+        length |= (byte & 0x7f) << shift
+        shift += 7
+        if not byte & 0x80:
+            break
+    candidate = decoded[position:position + length]
+    if len(candidate) != length or not candidate.startswith((b'http://', b'https://')):
+        return None
+    try:
+        return candidate.decode('utf-8')
+    except UnicodeDecodeError:
+        return None
+
+class RedirectCache:
+    """JSON-backed LRU cache of resolved redirects with a time-to-live, safe to share between threads"""
+
+    def __init__(self, filename='redirects.json', directory=None, max_entries=5000, ttl_days=90):
+        self.path = os.path.join(directory or STATE_DIRECTORY, filename)
+        self.max_entries = max_entries
+        self.ttl = timedelta(days=ttl_days)
+        self.entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Read redirects resolved by previous runs, least recently used first"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f).get('redirects', [])
+            self.entries = OrderedDict((url, (target, resolved_at)) for url, target, resolved_at in entries)
+        except (OSError, ValueError, TypeError) as e:
+            print(f"Ignoring unreadable redirect cache {self.path}: {e}")
+            self.entries = OrderedDict()
+
+    def get(self, url):
+        """Cached target of a redirect, or None when unknown or expired"""
+        with self._lock:
+            entry = self.entries.get(url)
+            if entry is None:
+                return None
+            target, resolved_at = entry
+            if datetime.fromisoformat(resolved_at) < datetime.now() - self.ttl:
+                del self.entries[url]
+                return None
+            self.entries.move_to_end(url)
+            return target
+
+    def put(self, url, target):
+        """Remember a redirect target, evicting the least recently used entries beyond max_entries"""
+        with self._lock:
+            self.entries[url] = (target, datetime.now().isoformat())
+            self.entries.move_to_end(url)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def save(self):
+        """Write the cache atomically"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with self._lock:
+            data = {'version': 1, 'redirects': [[url, target, resolved_at]
+                                                for url, (target, resolved_at) in self.entries.items()]}
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def __len__(self):
+        return len(self.entries)
+
+def resolve_redirect(url, cache):
+    """Publisher URL behind a Google News link, or the link itself when its id cannot be decoded
+
+    Current Google News article ids are not decodable offline and answer 200 with a
+    script redirect rather than an HTTP one, so they are left unresolved instead of
+    costing a blocking request each.
+    """
+    if not url or urlparse(url).netloc.lower() not in GNEWS_HOSTS:
+        return url
+    url = strip_tracking(url)
+    target = cache.get(url)
+    if target is not None:
+        return target
+
+    target = decode_gnews_url(url)
+    if target is None:
+        return url
+    target = strip_tracking(target)
+    cache.put(url, target)
+    return target
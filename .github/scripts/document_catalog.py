@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Official Document Catalog
+Loads, validates and selects entries from the official CRA document catalog file
+"""
+
+import json
+import os
+import re
+from fnmatch import fnmatchcase
+
+DEFAULT_CATALOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'catalog', 'official-documents.json')
+
+# Field validators, compiled once at import and applied to every catalog entry
+DOCUMENT_SCHEMA = {
+    'url': re.compile(r'^https?://\S+$'),
+    'filename': re.compile(r'^[A-Za-z0-9][A-Za-z0-9._-]*$'),
+    'title': re.compile(r'\S'),
+    'type': re.compile(r'^[a-z][a-z0-9_]*$')
+}
+DOCUMENT_ID_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9._-]*$')
+FOLDER_PATTERN = re.compile(r'^[a-z][a-z0-9_-]*$')
+
+class CatalogError(ValueError):
+    """Raised when the catalog file does not match the expected schema"""
+
+class DocumentCatalog:
+    """Validated set of official documents with a precomputed type-to-folder table"""
+
+    def __init__(self, documents, folders, default_folder):
+        self.documents = documents
+        self.folders = folders
+        self.default_folder = default_folder
+
+    @classmethod
+    def load(cls, catalog_file=DEFAULT_CATALOG_FILE):
+        """Read and validate a catalog file"""
+        try:
+            with open(catalog_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CatalogError(f"Could not read catalog {catalog_file}: {e}")
+
+        return cls.from_dict(data, source=catalog_file)
+
+    @classmethod
+    def from_dict(cls, data, source='catalog'):
+        """Validate parsed catalog data, collecting every problem before failing"""
+        errors = []
+        folders = data.get('folders', {})
+        default_folder = data.get('default_folder', 'standards')
+        documents = data.get('documents', {})
+
+        if not isinstance(folders, dict) or not isinstance(documents, dict):
+            raise CatalogError(f"{source}: 'folders' and 'documents' must be objects")
+        for folder in list(folders.values()) + [default_folder]:
+            if not isinstance(folder, str) or not FOLDER_PATTERN.match(folder):
+                errors.append(f"invalid folder name {folder!r}")
+
+        seen_paths = {}
+        for doc_id, doc_info in documents.items():
+            if not DOCUMENT_ID_PATTERN.match(doc_id):
+                errors.append(f"invalid document id {doc_id!r}")
+            if not isinstance(doc_info, dict):
+                errors.append(f"{doc_id}: entry must be an object")
+                continue
+            for field, pattern in DOCUMENT_SCHEMA.items():
+                value = doc_info.get(field)
+                if not isinstance(value, str) or not pattern.search(value):
+                    errors.append(f"{doc_id}: missing or invalid '{field}'")
+            if not isinstance(doc_info.get('tags', []), list):
+                errors.append(f"{doc_id}: 'tags' must be a list")
+
+            # Two entries resolving to the same file would overwrite each other
+            path = (folders.get(doc_info.get('type'), default_folder), doc_info.get('filename'))
+            if path in seen_paths:
+                errors.append(f"{doc_id}: {path[0]}/{path[1]} already used by {seen_paths[path]}")
+            seen_paths[path] = doc_id
+
+        if errors:
+            raise CatalogError(f"{source}: {len(errors)} problem(s): " + '; '.join(errors))
+
+        return cls(documents, folders, default_folder)
+
+    def folder_for(self, doc_type):
+        """Subfolder that documents of the given type are stored in"""
+        return self.folders.get(doc_type, self.default_folder)
+
+    def all_folders(self):
+        """Every subfolder the catalog can place documents in"""
+        return sorted(set(self.folders.values()) | {self.default_folder})
+
+    def select(self, patterns=None):
+        """Return the entries matching any glob pattern by id, type, folder, filename or tag"""
+        if not patterns:
+            return dict(self.documents)
+
+        patterns = [pattern.lower() for pattern in patterns]
+        selected = {}
+        for doc_id, doc_info in self.documents.items():
+            keys = [doc_id, doc_info['type'], self.folder_for(doc_info['type']), doc_info['filename']]
+            keys.extend(doc_info.get('tags', []))
+            keys = [key.lower() for key in keys]
+            if any(fnmatchcase(key, pattern) for pattern in patterns for key in keys):
+                selected[doc_id] = doc_info
+        return selected
@@ -4,132 +4,531 @@ Official CRA Documents Downloader
 Downloads and organizes official EU documents related to the Cyber Resilience Act
 """
 
-import requests
 import os
 import json
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from datetime import datetime
 from urllib.parse import urlparse
 import hashlib
+import mmap
+import shutil
+import sys
+import time
+
+import http_client
+from document_catalog import DocumentCatalog, DEFAULT_CATALOG_FILE
+
+# Statuses that mean a valid local copy of the document is available
+SUCCESS_STATUSES = ('downloaded', 'unchanged', 'not_modified')
+
+# Bytes read from the network or disk at a time; bounds peak memory per download
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Larger buffer for offline archive verification, where throughput matters more than memory
+VERIFY_CHUNK_SIZE = 8 * 1024 * 1024
+
+def hash_file(path, chunk_size=DOWNLOAD_CHUNK_SIZE):
+    """Compute the SHA-256 of a file without loading it into memory"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        try:
+            # Hash straight from the page cache; empty files cannot be mapped
+            if size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    with memoryview(mapped) as view:
+                        for offset in range(0, size, chunk_size):
+                            digest.update(view[offset:offset + chunk_size])
+            return digest.hexdigest()
+        except (OSError, ValueError):
+            digest = hashlib.sha256()
+            f.seek(0)
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def verify_file(entry):
+    """Check one index entry against the file on disk; runs in a worker process"""
+    path = entry['path']
+    if not os.path.exists(path):
+        return {'path': path, 'filename': entry.get('filename'), 'problem': 'missing'}
+    
+    size = os.path.getsize(path)
+    file_hash = hash_file(path, VERIFY_CHUNK_SIZE)
+    result = {'path': path, 'filename': entry.get('filename'), 'size': size, 'hash': file_hash}
+    if file_hash != entry['hash'] or ('size' in entry and size != entry['size']):
+        result.update({'problem': 'corrupted', 'expected_hash': entry['hash'],
+                       'expected_size': entry.get('size')})
+    return result
+
+def prometheus_escape(value):
+    """Escape a Prometheus label value"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def render_step_summary(summary):
+    """Render a run summary as GitHub Actions step-summary markdown"""
+    counts = summary['status_counts']
+    lines = [
+        "## CRA News Update Summary",
+        "",
+        f"- Official documents processed: {summary['documents']} in {summary['duration_seconds']:.1f}s "
+        f"(started {summary['started_at'][:16].replace('T', ' ')})",
+        f"- Downloaded: {counts.get('downloaded', 0)}, not modified (304): {counts.get('not_modified', 0)}, "
+        f"unchanged: {counts.get('unchanged', 0)}, errors: {counts.get('error', 0)}",
+        f"- Bytes transferred: {summary['bytes_transferred']:,}, retries: {summary['retries']}",
+        "",
+        "| Host | Documents | Errors | Retries | Bytes | Max TTFB (ms) | Slowest (ms) |",
+        "|------|-----------|--------|---------|-------|---------------|--------------|"
+    ]
+    for host, stats in sorted(summary['hosts'].items(), key=lambda item: -item[1]['max_duration_ms']):
+        lines.append(f"| {host} | {stats['documents']} | {stats['errors']} | {stats['retries']} | "
+                     f"{stats['bytes_transferred']:,} | {stats['max_ttfb_ms']:.0f} | {stats['max_duration_ms']:.0f} |")
+    return '\n'.join(lines) + '\n'
+
+def parse_content_range(value):
+    """Parse a 'bytes start-end/total' header into (start, total); total is None if unknown"""
+    if not value or not value.startswith('bytes '):
+        return None
+    try:
+        span, total = value[6:].split('/')
+        start = int(span.split('-')[0])
+        return start, (None if total == '*' else int(total))
+    except ValueError:
+        return None
+
+def resume_validator(validators):
+    """Validator to send in If-Range for resuming a partial download, or None if none is strong enough"""
+    if not validators:
+        return None
+    etag = validators.get('etag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    # Weak ETags are not allowed in If-Range; a Last-Modified date is
+    return validators.get('last_modified')
+
+def range_matches(response, resume_from):
+    """Whether a response to a Range request can be appended to the resume_from bytes already on disk"""
+    if response.status_code == 416:
+        return False
+    if response.status_code != 206:
+        # A full 200 body (If-Range failed) or a 304 replaces the partial file anyway
+        return True
+    content_range = parse_content_range(response.headers.get('Content-Range'))
+    return content_range is not None and content_range[0] == resume_from
+
+class FileDigestCache:
+    """Persistent SHA-256 cache keyed by path and (size, mtime_ns, inode)"""
+    
+    def __init__(self, cache_file, trust_cache=True):
+        self.cache_file = cache_file
+        self.trust_cache = trust_cache
+        self.entries = {}
+        # Paths hashed or recorded during this run are trusted even when verifying
+        self._fresh = set()
+        self._lock = threading.Lock()
+    
+    def load(self):
+        """Read the cache file written by the previous run"""
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f).get('files', {})
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable hash cache {self.cache_file}: {e}")
+            self.entries = {}
+    
+    def _stat_key(self, path):
+        stat = os.stat(path)
+        return [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+    
+    def digest(self, path):
+        """Return the file's SHA-256, re-hashing only if it changed on disk"""
+        key = self._stat_key(path)
+        with self._lock:
+            entry = self.entries.get(path)
+            trusted = self.trust_cache or path in self._fresh
+        if trusted and entry and entry['stat'] == key:
+            return entry['sha256']
+        
+        file_hash = hash_file(path)
+        self.record(path, file_hash)
+        return file_hash
+    
+    def record(self, path, file_hash):
+        """Store a digest computed elsewhere, e.g. while streaming a download"""
+        key = self._stat_key(path)
+        with self._lock:
+            self.entries[path] = {'stat': key, 'sha256': file_hash}
+            self._fresh.add(path)
+    
+    def save(self):
+        """Write the cache atomically, dropping entries for files that no longer exist"""
+        with self._lock:
+            entries = {path: entry for path, entry in self.entries.items() if os.path.exists(path)}
+        tmp_path = self.cache_file + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'files': entries}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.cache_file)
 
 class CRADocumentDownloader:
-    def __init__(self):
+    def __init__(self, max_workers=8, per_host_limit=4, verify=False,
+                 catalog_file=DEFAULT_CATALOG_FILE, only=None):
         self.docs_directory = 'docs/official-documents'
-        self.official_documents = {
-            'cra_regulation': {
-                'url': 'https://eur-lex.europa.eu/resource.html?uri=cellar:864f472b-34e9-11ed-9c68-01aa75ed71a1.0001.02/DOC_1&format=PDF',
-                'filename': 'eu-cyber-resilience-act-regulation.pdf',
-                'title': 'EU Cyber Resilience Act - Official Regulation Text',
-                'type': 'regulation'
-            },
-            'cra_impact_assessment_1': {
-                'url': 'https://ec.europa.eu/newsroom/dae/redirection/document/89545',
-                'filename': 'cra-impact-assessment-main.pdf',
-                'title': 'CRA Impact Assessment - Main Document',
-                'type': 'assessment'
-            },
-            'cra_impact_assessment_2': {
-                'url': 'https://ec.europa.eu/newsroom/dae/redirection/document/89546',
-                'filename': 'cra-impact-assessment-annex-1.pdf',
-                'title': 'CRA Impact Assessment - Annex 1',
-                'type': 'assessment'
-            },
-            'cra_impact_assessment_3': {
-                'url': 'https://ec.europa.eu/newsroom/dae/redirection/document/89551',
-                'filename': 'cra-impact-assessment-annex-2.pdf',
-                'title': 'CRA Impact Assessment - Annex 2',
-                'type': 'assessment'
-            },
-            'cra_impact_assessment_4': {
-                'url': 'https://ec.europa.eu/newsroom/dae/redirection/document/89553',
-                'filename': 'cra-impact-assessment-annex-3.pdf',
-                'title': 'CRA Impact Assessment - Annex 3',
-                'type': 'assessment'
-            },
-            'enisa_guidelines': {
-                'url': 'https://www.enisa.europa.eu/sites/default/files/publications/ENISA_candidate%20scheme_EUCC.pdf',
-                'filename': 'enisa-cybersecurity-certification-analysis.pdf',
-                'title': 'ENISA Cybersecurity Certification Ecosystem Analysis',
-                'type': 'guidance'
-            }
-        }
+        
+        # Catalog entries live in a data file; `only` narrows the run to matching glob patterns
+        self.catalog = DocumentCatalog.load(catalog_file)
+        self.only = only
+        self.official_documents = self.catalog.select(only)
         
         self.index_file = os.path.join(self.docs_directory, 'index.json')
+        self.summary_file = os.path.join(self.docs_directory, 'run-summary.json')
+        self.metrics_file = os.path.join(self.docs_directory, 'metrics.prom')
+        
+        # Content-addressed store: every distinct document version is kept once, by SHA-256
+        self.blob_directory = os.path.join(self.docs_directory, 'blobs', 'sha256')
+        
+        # Digests of files already on disk; verify=True ignores cached values and re-hashes
+        self.digest_cache = FileDigestCache(os.path.join(self.docs_directory, 'hash-cache.json'),
+                                            trust_cache=not verify)
+        
+        # Concurrency settings: total worker threads and simultaneous requests per host
+        self.max_workers = max(1, max_workers)
+        self.per_host_limit = max(1, per_host_limit)
+        self._host_slots = {}
+        self._host_slots_lock = threading.Lock()
+        
+        # Metadata from the last run's index.json, used for conditional requests
+        self.previous_index = {}
         
     def create_directory_structure(self):
         """Create necessary directories"""
         os.makedirs(self.docs_directory, exist_ok=True)
         
         # Create subdirectories for different document types
-        for doc_type in ['regulations', 'assessments', 'guidance', 'standards']:
+        for doc_type in self.catalog.all_folders():
             os.makedirs(os.path.join(self.docs_directory, doc_type), exist_ok=True)
+        os.makedirs(self.blob_directory, exist_ok=True)
+    
+    def _host_slot(self, url):
+        """Return the semaphore capping concurrent requests to the URL's host"""
+        host = urlparse(url).netloc.lower()
+        with self._host_slots_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_slots[host]
+    
+    def load_previous_index(self):
+        """Load per-document metadata recorded by the previous run, keyed by filename"""
+        if not os.path.exists(self.index_file):
+            return {}
+        
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                index_data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not read previous index {self.index_file}: {e}")
+            return {}
+        
+        return {doc['filename']: doc for doc in index_data.get('documents', []) if 'filename' in doc}
+    
+    def _conditional_headers(self, previous, file_path):
+        """Build If-None-Match/If-Modified-Since headers from the previous run's validators"""
+        # Validators are only useful while the local copy they describe is still intact
+        if not previous or 'hash' not in previous or not os.path.exists(file_path):
+            return {}
+        if self.digest_cache.digest(file_path) != previous['hash']:
+            print(f"Local copy of {previous['filename']} does not match index.json, fetching in full")
+            return {}
+        
+        headers = {}
+        if previous.get('etag'):
+            headers['If-None-Match'] = previous['etag']
+        if previous.get('last_modified'):
+            headers['If-Modified-Since'] = previous['last_modified']
+        return headers
     
     def download_document(self, doc_info):
         """Download a single document"""
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            
-            response = requests.get(doc_info['url'], headers=headers, timeout=30)
-            response.raise_for_status()
-            
             # Determine file path based on document type
-            doc_type = doc_info.get('type', 'misc')
-            if doc_type == 'regulation':
-                subfolder = 'regulations'
-            elif doc_type == 'assessment':
-                subfolder = 'assessments'
-            elif doc_type == 'guidance':
-                subfolder = 'guidance'
-            else:
-                subfolder = 'standards'
-            
+            subfolder = self.catalog.folder_for(doc_info.get('type', 'misc'))
             file_path = os.path.join(self.docs_directory, subfolder, doc_info['filename'])
+            previous = self.previous_index.get(doc_info['filename'])
+            replaced_hash = None
             
-            # Check if file already exists and compare checksums
-            file_hash = hashlib.sha256(response.content).hexdigest()
-            
-            if os.path.exists(file_path):
-                with open(file_path, 'rb') as f:
-                    existing_hash = hashlib.sha256(f.read()).hexdigest()
-                
-                if existing_hash == file_hash:
-                    print(f"Document {doc_info['filename']} is already up to date")
-                    return {
-                        'filename': doc_info['filename'],
-                        'path': file_path,
-                        'status': 'unchanged',
-                        'hash': file_hash,
-                        'size': len(response.content),
-                        'last_updated': datetime.now().isoformat()
-                    }
-            
-            # Write the file
-            with open(file_path, 'wb') as f:
-                f.write(response.content)
+            # PDFs are already compressed, and Range offsets must refer to the raw bytes
+            headers = {
+                'Accept-Encoding': 'identity'
+            }
+            headers.update(self._conditional_headers(previous, file_path))
             
-            print(f"Downloaded: {doc_info['filename']} ({len(response.content)} bytes)")
+            # Resume an interrupted transfer from where the partial file stopped
+            part_path = file_path + '.part'
+            part_validators = self._load_part_validators(part_path)
+            resume_from = os.path.getsize(part_path) if part_validators is not None else 0
+            if_range = resume_validator(part_validators) if resume_from else None
+            if resume_from and not if_range:
+                # Without If-Range a changed document would be appended to the stale bytes
+                print(f"Partial download of {doc_info['filename']} has no strong validator, fetching in full")
+                self._discard_part(part_path)
+                resume_from = 0
+            if resume_from:
+                headers['Range'] = f'bytes={resume_from}-'
+                headers['If-Range'] = if_range
             
-            return {
+            metadata = {
                 'filename': doc_info['filename'],
                 'path': file_path,
                 'title': doc_info['title'],
                 'url': doc_info['url'],
                 'type': doc_info['type'],
-                'status': 'downloaded',
-                'hash': file_hash,
-                'size': len(response.content),
-                'last_updated': datetime.now().isoformat()
             }
             
+            metrics = {'host': urlparse(doc_info['url']).netloc.lower(), 'bytes_transferred': 0,
+                       'transfer_ms': 0.0, 'resumed_from': 0}
+            with self._host_slot(doc_info['url']):
+                request_started = time.perf_counter()
+                while True:
+                    with http_client.get(doc_info['url'], headers=headers, stream=True) as response:
+                        metrics.update(response.fetch_stats)
+                        if resume_from and not range_matches(response, resume_from):
+                            # The partial file no longer matches the remote document; start over
+                            print(f"Partial download of {doc_info['filename']} no longer matches the server "
+                                  f"(HTTP {response.status_code}), fetching in full")
+                            self._discard_part(part_path)
+                            resume_from = 0
+                            headers.pop('Range', None)
+                            headers.pop('If-Range', None)
+                            continue
+                        not_modified = response.status_code == 304
+                        if not_modified:
+                            # A 304 may omit validators, so keep the ones we sent
+                            metadata.update(self._response_validators(response, previous))
+                        else:
+                            response.raise_for_status()
+                            metadata.update(self._response_validators(response))
+                            file_hash, file_size = self._stream_to_part(response, part_path, resume_from,
+                                                                        metadata, metrics)
+                    break
+                metrics['duration_ms'] = round((time.perf_counter() - request_started) * 1000, 3)
+            
+            if not_modified:
+                print(f"Document {doc_info['filename']} not modified on server")
+                self._discard_part(part_path)
+                file_hash = previous['hash']
+                file_size = previous.get('size', os.path.getsize(file_path))
+                status = 'not_modified'
+                metrics['cache'] = 'revalidated'
+                blob_path = self._ingest_blob(file_path, file_hash)
+            elif os.path.exists(file_path) and self.digest_cache.digest(file_path) == file_hash:
+                # Check if file already exists and compare checksums
+                print(f"Document {doc_info['filename']} is already up to date")
+                self._discard_part(part_path)
+                status = 'unchanged'
+                metrics['cache'] = 'hash_hit'
+                blob_path = self._ingest_blob(file_path, file_hash)
+            else:
+                # Keep the version being replaced in the blob store before swapping the link
+                if os.path.exists(file_path):
+                    replaced_hash = self.digest_cache.digest(file_path)
+                    self._ingest_blob(file_path, replaced_hash)
+                blob_path = self._store_part(part_path, file_hash)
+                self._discard_part(part_path)
+                print(f"Downloaded: {doc_info['filename']} ({file_size} bytes)")
+                status = 'downloaded'
+                metrics['cache'] = 'miss'
+            
+            self._link_from_store(blob_path, file_path)
+            self.digest_cache.record(file_path, file_hash)
+            
+            metadata.update({
+                'status': status,
+                'hash': file_hash,
+                'size': file_size,
+                'blob': blob_path,
+                'last_updated': datetime.now().isoformat(),
+                'metrics': metrics
+            })
+            metadata['versions'] = self._version_history(previous, metadata, replaced_hash)
+            return metadata
+            
         except Exception as e:
             print(f"Error downloading {doc_info['filename']}: {e}")
-            return {
+            # A failed attempt keeps the last good copy's path, hash, validators and
+            # version history, so the next run can still revalidate it conditionally
+            previous = self.previous_index.get(doc_info['filename']) or {}
+            result = {key: value for key, value in previous.items() if key not in ('error', 'metrics')}
+            result.update({
                 'filename': doc_info['filename'],
                 'status': 'error',
                 'error': str(e),
-                'last_attempted': datetime.now().isoformat()
-            }
+                'last_attempted': datetime.now().isoformat(),
+                'metrics': {'host': urlparse(doc_info['url']).netloc.lower()}
+            })
+            return result
+    
+    def _blob_path(self, file_hash):
+        """Location of a blob in the content-addressed store"""
+        return os.path.join(self.blob_directory, file_hash[:2], file_hash)
+    
+    def _store_part(self, part_path, file_hash):
+        """Move a completed download into the blob store, or drop it if the bytes are already there"""
+        blob_path = self._blob_path(file_hash)
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        # An existing blob is only reused if it still holds the bytes its name promises
+        if os.path.exists(blob_path) and self.digest_cache.digest(blob_path) == file_hash:
+            os.remove(part_path)
+        else:
+            os.replace(part_path, blob_path)
+            os.chmod(blob_path, 0o444)
+            self.digest_cache.record(blob_path, file_hash)
+        return blob_path
+    
+    def _ingest_blob(self, file_path, file_hash):
+        """Make sure an existing document file is present in the blob store"""
+        blob_path = self._blob_path(file_hash)
+        if not os.path.exists(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            tmp_path = f"{blob_path}.{threading.get_ident()}.tmp"
+            try:
+                os.link(file_path, tmp_path)
+            except OSError:
+                shutil.copyfile(file_path, tmp_path)
+            os.replace(tmp_path, blob_path)
+            os.chmod(blob_path, 0o444)
+        return blob_path
+    
+    def _link_from_store(self, blob_path, file_path):
+        """Point a category file at its blob: hardlink, else symlink, else copy"""
+        if os.path.exists(file_path) and os.path.samefile(blob_path, file_path):
+            return
+        
+        tmp_path = f"{file_path}.{threading.get_ident()}.link"
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        try:
+            os.link(blob_path, tmp_path)
+        except OSError:
+            try:
+                os.symlink(os.path.relpath(blob_path, os.path.dirname(file_path)), tmp_path)
+            except OSError:
+                shutil.copyfile(blob_path, tmp_path)
+        os.replace(tmp_path, file_path)
+    
+    def _version_history(self, previous, metadata, replaced_hash=None):
+        """Append the current content to the document's version history if it is new"""
+        versions = list(previous.get('versions', [])) if previous else []
+        if previous and not versions and previous.get('hash'):
+            # Index written before version tracking: seed history with the last known content
+            versions.append({
+                'hash': previous['hash'],
+                'size': previous.get('size'),
+                'blob': self._blob_path(previous['hash']),
+                'first_seen': previous.get('last_updated')
+            })
+        if replaced_hash and (not versions or versions[-1]['hash'] != replaced_hash):
+            # A local file that predates the index was just replaced; keep it as a known version
+            versions.append({
+                'hash': replaced_hash,
+                'size': os.path.getsize(self._blob_path(replaced_hash)),
+                'blob': self._blob_path(replaced_hash),
+                'first_seen': None
+            })
+        
+        if not versions or versions[-1]['hash'] != metadata['hash']:
+            versions.append({
+                'hash': metadata['hash'],
+                'size': metadata['size'],
+                'blob': metadata['blob'],
+                'first_seen': metadata['last_updated'],
+                'etag': metadata.get('etag'),
+                'last_modified': metadata.get('last_modified')
+            })
+        return versions
+    
+    def _stream_to_part(self, response, part_path, resume_from, validators, metrics):
+        """Stream a response body into the .part file, hashing it chunk by chunk"""
+        digest = hashlib.sha256()
+        content_range = parse_content_range(response.headers.get('Content-Range'))
+        
+        if response.status_code == 206 and content_range and content_range[0] == resume_from:
+            # The server honoured the Range request: hash what we already have and append
+            mode = 'ab'
+            with open(part_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+            size = resume_from
+            metrics['resumed_from'] = resume_from
+        elif response.status_code == 206:
+            # Never write a partial body as if it were the whole document
+            raise IOError(f"unexpected partial response (Content-Range: {response.headers.get('Content-Range')})")
+        else:
+            mode = 'wb'
+            size = 0
+        
+        # Remember what we are downloading so a later run can resume it safely
+        self._save_part_validators(part_path, validators)
+        
+        transfer_started = time.perf_counter()
+        with open(part_path, mode) as f:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                if not chunk:
+                    continue
+                f.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+                metrics['bytes_transferred'] += len(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        transfer_seconds = time.perf_counter() - transfer_started
+        metrics['transfer_ms'] = round(transfer_seconds * 1000, 3)
+        metrics['bytes_per_second'] = round(metrics['bytes_transferred'] / transfer_seconds) if transfer_seconds else None
+        
+        expected_size = validators.get('content_length')
+        if expected_size and response.headers.get('Content-Encoding') in (None, 'identity') and int(expected_size) != size:
+            raise IOError(f"incomplete download: got {size} of {expected_size} bytes")
+        
+        return digest.hexdigest(), size
+    
+    def _load_part_validators(self, part_path):
+        """Return the validators of a resumable partial download, or None if there is none"""
+        if not os.path.exists(part_path) or not os.path.exists(part_path + '.json'):
+            return None
+        try:
+            with open(part_path + '.json', 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _save_part_validators(self, part_path, validators):
+        """Record the validators of the transfer being written to a .part file"""
+        with open(part_path + '.json', 'w', encoding='utf-8') as f:
+            json.dump({key: validators.get(key) for key in ('etag', 'last_modified', 'content_length')}, f)
+    
+    def _discard_part(self, part_path):
+        """Remove a partial download and its validator sidecar"""
+        for path in (part_path, part_path + '.json'):
+            if os.path.exists(path):
+                os.remove(path)
+    
+    def _response_validators(self, response, previous=None):
+        """Extract ETag/Last-Modified/Content-Length, falling back to previously stored values"""
+        previous = previous or {}
+        validators = {
+            'etag': response.headers.get('ETag') or previous.get('etag'),
+            'last_modified': response.headers.get('Last-Modified') or previous.get('last_modified'),
+        }
+        if response.status_code == 304:
+            validators['content_length'] = previous.get('content_length')
+        elif response.status_code == 206:
+            content_range = parse_content_range(response.headers.get('Content-Range'))
+            validators['content_length'] = str(content_range[1]) if content_range and content_range[1] else None
+        else:
+            validators['content_length'] = response.headers.get('Content-Length')
+        return {key: value for key, value in validators.items() if value}
     
     def generate_readme(self, download_results):
         """Generate README for the documents directory"""
@@ -160,19 +559,27 @@ Referenced standards and technical specifications.
 """
         
         for result in download_results:
-            if result['status'] in ['downloaded', 'unchanged']:
+            # Documents whose last download failed are still listed while their previous copy is kept
+            if result['status'] in SUCCESS_STATUSES or 'hash' in result:
                 size_mb = round(result['size'] / (1024 * 1024), 2) if 'size' in result else 'N/A'
                 readme_content += f"| [{result['filename']}]({result['path']}) | {result.get('type', 'N/A')} | {size_mb} MB | {result['last_updated'][:10]} | {result['status']} |\n"
         
         readme_content += f"""
+## Storage Layout
+
+Document bytes are stored once in a content-addressed store under `blobs/sha256/`, named by their SHA256 checksum. The files in the category folders are links into that store, so identical documents are never stored twice. Previous versions of each document stay in the store and are listed in the `versions` history in `index.json`.
+
 ## Verification
 
 All documents include SHA256 checksums for integrity verification. See `index.json` for detailed metadata.
 
+Checksums of files already on disk are cached in `hash-cache.json` and reused while a file's size, modification time and inode are unchanged. Run `python .github/scripts/download_official_docs.py --verify` to force a full re-hash.
+
 ## Usage Notes
 
 - Documents are automatically updated daily
 - Check the status column for the latest download information
+- `not_modified` means the publisher confirmed the local copy is current (HTTP 304), so nothing was re-downloaded
 - All documents are official sources from EU institutions
 - For the most current versions, always verify against official EU sources
 
@@ -190,31 +597,264 @@ These documents are reproduced for compliance and educational purposes. All righ
         index_data = {
             'last_updated': datetime.now().isoformat(),
             'documents': download_results,
-            'total_documents': len([r for r in download_results if r['status'] in ['downloaded', 'unchanged']]),
+            'total_documents': len([r for r in download_results if r['status'] in SUCCESS_STATUSES]),
             'total_size_bytes': sum(r.get('size', 0) for r in download_results if 'size' in r)
         }
         
         with open(self.index_file, 'w', encoding='utf-8') as f:
             json.dump(index_data, f, indent=2)
     
+    def build_run_summary(self, download_results, started_at, duration_seconds):
+        """Aggregate per-document metrics into per-host and per-run figures"""
+        status_counts = {}
+        hosts = {}
+        for result in download_results:
+            status_counts[result['status']] = status_counts.get(result['status'], 0) + 1
+            metrics = result.get('metrics', {})
+            host = hosts.setdefault(metrics.get('host', 'unknown'), {
+                'documents': 0, 'errors': 0, 'retries': 0, 'bytes_transferred': 0,
+                'transfer_ms': 0.0, 'max_ttfb_ms': 0.0, 'max_duration_ms': 0.0
+            })
+            host['documents'] += 1
+            host['errors'] += result['status'] == 'error'
+            host['retries'] += metrics.get('retries', 0)
+            host['bytes_transferred'] += metrics.get('bytes_transferred', 0)
+            host['transfer_ms'] = round(host['transfer_ms'] + metrics.get('transfer_ms', 0.0), 3)
+            host['max_ttfb_ms'] = max(host['max_ttfb_ms'], metrics.get('ttfb_ms', 0.0))
+            host['max_duration_ms'] = max(host['max_duration_ms'], metrics.get('duration_ms', 0.0))
+        
+        slowest = sorted((r for r in download_results if 'duration_ms' in r.get('metrics', {})),
+                         key=lambda r: r['metrics']['duration_ms'], reverse=True)[:5]
+        
+        return {
+            'started_at': started_at.isoformat(),
+            'duration_seconds': round(duration_seconds, 3),
+            'documents': len(download_results),
+            'status_counts': status_counts,
+            'bytes_transferred': sum(host['bytes_transferred'] for host in hosts.values()),
+            'retries': sum(host['retries'] for host in hosts.values()),
+            'hosts': hosts,
+            'slowest': [{'filename': r['filename'], 'host': r['metrics']['host'],
+                         'duration_ms': r['metrics']['duration_ms']} for r in slowest]
+        }
+    
+    def write_run_summary(self, summary):
+        """Write the JSON run summary next to index.json"""
+        with open(self.summary_file, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+    
+    def write_prometheus_metrics(self, summary, download_results):
+        """Write a node_exporter textfile-collector file with per-document and per-run metrics"""
+        lines = []
+        
+        def metric(name, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{prometheus_escape(val)}"' for key, val in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+        
+        measured = [r for r in download_results if 'duration_ms' in r.get('metrics', {})]
+        
+        def doc_labels(result):
+            return {'document': result['filename'], 'host': result['metrics']['host']}
+        
+        metric('cra_document_ttfb_seconds', 'Time to first byte of the last document request.',
+               [(doc_labels(r), round(r['metrics']['ttfb_ms'] / 1000, 6)) for r in measured])
+        metric('cra_document_transfer_seconds', 'Time spent receiving the document body.',
+               [(doc_labels(r), round(r['metrics']['transfer_ms'] / 1000, 6)) for r in measured])
+        metric('cra_document_bytes_transferred', 'Body bytes received for the document in this run.',
+               [(doc_labels(r), r['metrics']['bytes_transferred']) for r in measured])
+        metric('cra_document_retries', 'Retries needed before the document request succeeded.',
+               [(doc_labels(r), r['metrics']['retries']) for r in measured])
+        metric('cra_document_status', 'Outcome of the document in this run (1 for the current status).',
+               [({'document': r['filename'], 'status': r['status']}, 1) for r in download_results])
+        metric('cra_documents_run_duration_seconds', 'Wall-clock duration of the download run.',
+               [({}, summary['duration_seconds'])])
+        metric('cra_documents_run_bytes_transferred', 'Total body bytes received in the download run.',
+               [({}, summary['bytes_transferred'])])
+        metric('cra_documents_run_timestamp_seconds', 'Unix time the download run started.',
+               [({}, datetime.fromisoformat(summary['started_at']).timestamp())])
+        
+        with open(self.metrics_file, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+    
     def run(self):
         """Main execution function"""
         print("Starting official document download...")
         
         self.create_directory_structure()
-        download_results = []
+        self.previous_index = self.load_previous_index()
+        self.digest_cache.load()
+        documents = list(self.official_documents.items())
+        started_at = datetime.now()
+        run_started = time.perf_counter()
+        
+        # Results keep catalog order regardless of which download finishes first
+        if self.max_workers > 1 and len(documents) > 1:
+            workers = min(self.max_workers, len(documents))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                download_results = list(executor.map(self._process_document, documents))
+        else:
+            download_results = [self._process_document(item) for item in documents]
         
-        for doc_id, doc_info in self.official_documents.items():
-            print(f"Processing {doc_id}...")
-            result = self.download_document(doc_info)
-            download_results.append(result)
+        successful_downloads = len([r for r in download_results if r['status'] in SUCCESS_STATUSES])
+        processed = len(download_results)
+        summary = self.build_run_summary(download_results, started_at, time.perf_counter() - run_started)
+        if self.only:
+            download_results = self._merge_unselected(download_results)
         
         self.generate_readme(download_results)
         self.update_index(download_results)
+        self.digest_cache.save()
+        self.write_run_summary(summary)
+        self.write_prometheus_metrics(summary, download_results)
+        
+        print(f"Document download completed: {successful_downloads}/{processed} successful")
+    
+    def verify(self, processes=None):
+        """Check every file listed in index.json against its recorded hash and size, offline"""
+        print("Starting official document verification...")
+        
+        if not os.path.exists(self.index_file):
+            print(f"No index found at {self.index_file}, nothing to verify")
+            return None
         
-        successful_downloads = len([r for r in download_results if r['status'] in ['downloaded', 'unchanged']])
-        print(f"Document download completed: {successful_downloads}/{len(download_results)} successful")
+        with open(self.index_file, 'r', encoding='utf-8') as f:
+            index_data = json.load(f)
+        
+        entries = [doc for doc in index_data.get('documents', []) if doc.get('path') and doc.get('hash')]
+        
+        # Failed attempts in older indexes kept only the version history; the category
+        # file still holds the last version and must not be reported as orphaned
+        catalog_paths = {doc_info['filename']: os.path.join(self.docs_directory,
+                                                            self.catalog.folder_for(doc_info.get('type', 'misc')),
+                                                            doc_info['filename'])
+                         for doc_info in self.catalog.documents.values()}
+        for doc in index_data.get('documents', []):
+            if doc.get('path') and doc.get('hash'):
+                continue
+            last_version = (doc.get('versions') or [{}])[-1]
+            path = doc.get('path') or catalog_paths.get(doc.get('filename'))
+            if path and last_version.get('hash'):
+                entry = {'path': path, 'filename': doc.get('filename'), 'hash': last_version['hash']}
+                if last_version.get('size') is not None:
+                    entry['size'] = last_version['size']
+                entries.append(entry)
+        
+        # Every historic version lives in the blob store and is checked once, however many documents share it
+        blob_entries = {}
+        for doc in index_data.get('documents', []):
+            for version in doc.get('versions', []):
+                if version.get('blob') and version.get('hash'):
+                    blob_entries.setdefault(os.path.normpath(version['blob']), {
+                        'path': version['blob'],
+                        'filename': doc.get('filename'),
+                        'hash': version['hash'],
+                        'size': version.get('size')
+                    })
+        for entry in blob_entries.values():
+            if entry['size'] is None:
+                del entry['size']
+        entries.extend(blob_entries.values())
+        listed_paths = {os.path.normpath(doc['path']) for doc in entries}
+        
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(executor.map(verify_file, entries))
+        
+        # Files in the category folders that index.json does not know about
+        orphaned = []
+        for folder in self.catalog.all_folders():
+            folder_path = os.path.join(self.docs_directory, folder)
+            if not os.path.isdir(folder_path):
+                continue
+            for name in sorted(os.listdir(folder_path)):
+                path = os.path.join(folder_path, name)
+                if name.endswith(('.part', '.part.json')) or not os.path.isfile(path):
+                    continue
+                if os.path.normpath(path) not in listed_paths:
+                    orphaned.append({'path': path, 'size': os.path.getsize(path)})
+        
+        if os.path.isdir(self.blob_directory):
+            for root, _, names in os.walk(self.blob_directory):
+                for name in sorted(names):
+                    path = os.path.join(root, name)
+                    if os.path.normpath(path) not in listed_paths:
+                        orphaned.append({'path': path, 'size': os.path.getsize(path)})
+        
+        report = {
+            'verified_at': datetime.now().isoformat(),
+            'index_file': self.index_file,
+            'checked': len(results),
+            'ok': len([r for r in results if 'problem' not in r]),
+            'missing': [r for r in results if r.get('problem') == 'missing'],
+            'corrupted': [r for r in results if r.get('problem') == 'corrupted'],
+            'orphaned': orphaned
+        }
+        
+        report_path = os.path.join(self.docs_directory, 'verification-report.json')
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        
+        print(f"Verified {report['checked']} documents: {report['ok']} ok, "
+              f"{len(report['missing'])} missing, {len(report['corrupted'])} corrupted, "
+              f"{len(report['orphaned'])} orphaned")
+        print(f"Report written to {report_path}")
+        return report
+    
+    def _merge_unselected(self, download_results):
+        """Carry forward previous index entries for catalog documents outside the selected slice"""
+        results_by_filename = {result['filename']: result for result in download_results}
+        merged = []
+        for doc_id, doc_info in self.catalog.documents.items():
+            filename = doc_info['filename']
+            if filename in results_by_filename:
+                merged.append(results_by_filename.pop(filename))
+            elif filename in self.previous_index:
+                merged.append(self.previous_index[filename])
+        merged.extend(results_by_filename.values())
+        return merged
+    
+    def _process_document(self, item):
+        """Download one (doc_id, doc_info) catalog entry"""
+        doc_id, doc_info = item
+        print(f"Processing {doc_id}...")
+        return self.download_document(doc_info)
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description='Download official CRA documents')
+    parser.add_argument('command', nargs='?', choices=['run', 'verify', 'summary'], default='run',
+                        help="'run' downloads the catalog, 'verify' checks the local archive offline, "
+                             "'summary' prints the last run as step-summary markdown")
+    parser.add_argument('--workers', type=int, default=8,
+                        help='number of concurrent downloads (1 disables concurrency)')
+    parser.add_argument('--per-host', type=int, default=4,
+                        help='maximum simultaneous requests to a single host')
+    parser.add_argument('--verify', action='store_true',
+                        help='re-hash every local file instead of trusting the hash cache')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='worker processes for the verify command (default: CPU count)')
+    parser.add_argument('--catalog', default=DEFAULT_CATALOG_FILE,
+                        help='JSON catalog of official documents to download')
+    parser.add_argument('--only', action='append', metavar='PATTERN',
+                        help='only process documents whose id, type, folder, filename or tag matches '
+                             'this glob pattern (repeatable)')
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    downloader = CRADocumentDownloader()
-    downloader.run()
+    args = parse_args()
+    downloader = CRADocumentDownloader(max_workers=args.workers, per_host_limit=args.per_host,
+                                       verify=args.verify, catalog_file=args.catalog, only=args.only)
+    if args.command == 'summary':
+        if not os.path.exists(downloader.summary_file):
+            print("## CRA News Update Summary\n\n- No official document run summary available")
+        else:
+            with open(downloader.summary_file, 'r', encoding='utf-8') as f:
+                print(render_step_summary(json.load(f)), end='')
+    elif args.command == 'verify':
+        report = downloader.verify(processes=args.processes)
+        if report is None or report['missing'] or report['corrupted'] or report['orphaned']:
+            sys.exit(1)
+    else:
+        downloader.run()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+News Feed Catalog
+Loads and validates the news source catalog (OPML, or YAML/JSON) with each
+source's type, schedule and priority
+"""
+
+import json
+import os
+import re
+import xml.etree.ElementTree as ElementTree
+
+from document_catalog import CatalogError
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+DEFAULT_FEED_CATALOG_FILE = os.environ.get(
+    'CRA_NEWS_CATALOG', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'catalog', 'news-sources.opml'))
+
+SOURCE_TYPES = ('rss', 'web', 'gnews')
+SOURCE_NAME_PATTERN = re.compile(r'^[a-z0-9][a-z0-9_-]*$')
+URL_PATTERN = re.compile(r'^https?://\S+$')
+
+# Schedules such as "30m", "6h", "1d" or "2w"; empty or "always" means every run
+_INTERVAL = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([smhdw])\s*$', re.I)
+_INTERVAL_SECONDS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+def parse_interval(text):
+    """Seconds in a schedule string, 0 for every run, None when unreadable"""
+    if text is None or str(text).strip().lower() in ('', 'always', 'every run'):
+        return 0
+    if isinstance(text, (int, float)):
+        return int(text)
+    match = _INTERVAL.match(str(text))
+    if not match:
+        return None
+    return int(float(match.group(1)) * _INTERVAL_SECONDS[match.group(2).lower()])
+
+def source_name(text):
+    """Catalog name derived from a title or URL"""
+    return re.sub(r'[^a-z0-9]+', '_', (text or '').lower()).strip('_')
+
+def _split_keywords(value):
+    if isinstance(value, str):
+        return [keyword.strip() for keyword in value.split(',') if keyword.strip()]
+    return value
+
+def _opml_entries(path):
+    """Source entries from an OPML file; enclosing outlines become categories"""
+    try:
+        root = ElementTree.parse(path).getroot()
+    except (OSError, ElementTree.ParseError) as e:
+        raise CatalogError(f"Could not read catalog {path}: {e}")
+    body = root.find('body')
+    if body is None:
+        raise CatalogError(f"{path}: OPML file has no <body>")
+
+    entries = []
+
+    def walk(element, category):
+        for outline in element.findall('outline'):
+            attributes = dict(outline.attrib)
+            url = attributes.get('xmlUrl') or attributes.get('htmlUrl') or attributes.get('url')
+            if url or attributes.get('type') == 'gnews':
+                entries.append({
+                    'name': attributes.get('name'),
+                    'title': attributes.get('title') or attributes.get('text'),
+                    'url': url,
+                    # Plain OPML feed outlines have type="rss"; a page without a feed is scraped
+                    'type': attributes.get('type') or ('rss' if attributes.get('xmlUrl') else 'web'),
+                    'schedule': attributes.get('schedule'),
+                    'priority': attributes.get('priority', 0),
+                    'category': attributes.get('category', category),
+                    'keywords': _split_keywords(attributes.get('keywords'))
+                })
+            else:
+                walk(outline, attributes.get('text') or attributes.get('title') or category)
+
+    walk(body, None)
+    return entries
+
+def _data_entries(path):
+    """Source entries from a YAML or JSON file with a 'sources' list or mapping"""
+    is_yaml = path.endswith(('.yaml', '.yml'))
+    if is_yaml and yaml is None:
+        raise CatalogError(f"Could not read catalog {path}: PyYAML is not installed")
+    read_errors = (OSError, ValueError) + ((yaml.YAMLError,) if yaml is not None else ())
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = yaml.safe_load(f) if is_yaml else json.load(f)
+    except read_errors as e:
+        raise CatalogError(f"Could not read catalog {path}: {e}")
+
+    sources = (data or {}).get('sources', []) if isinstance(data, dict) else None
+    if isinstance(sources, dict):
+        sources = [dict(config or {}, name=name) for name, config in sources.items()]
+    if not isinstance(sources, list):
+        raise CatalogError(f"{path}: 'sources' must be a list or mapping")
+    return [dict(entry) if isinstance(entry, dict) else {'invalid': entry} for entry in sources]
+
+class FeedCatalog:
+    """Validated news sources, highest priority first"""
+
+    def __init__(self, sources):
+        self.sources = sources
+
+    @classmethod
+    def load(cls, catalog_file=DEFAULT_FEED_CATALOG_FILE):
+        """Read and validate a catalog file; the format follows the extension"""
+        if catalog_file.endswith(('.opml', '.xml')):
+            entries = _opml_entries(catalog_file)
+        else:
+            entries = _data_entries(catalog_file)
+        return cls.from_entries(entries, source=catalog_file)
+
+    @classmethod
+    def from_entries(cls, entries, source='catalog'):
+        """Validate source entries, collecting every problem before failing"""
+        errors = []
+        sources = {}
+        for index, entry in enumerate(entries):
+            if 'invalid' in entry:
+                errors.append(f"entry {index + 1} must be a mapping")
+                continue
+            name = entry.get('name') or source_name(entry.get('title') or entry.get('url'))
+            if not SOURCE_NAME_PATTERN.match(name or ''):
+                errors.append(f"entry {index + 1}: invalid source name {name!r}")
+                continue
+            if name in sources:
+                errors.append(f"{name}: defined more than once")
+                continue
+
+            source_type = entry.get('type')
+            if source_type not in SOURCE_TYPES:
+                errors.append(f"{name}: type must be one of {', '.join(SOURCE_TYPES)}")
+            url = entry.get('url')
+            keywords = _split_keywords(entry.get('keywords'))
+            if source_type == 'gnews':
+                if not keywords or not isinstance(keywords, list):
+                    errors.append(f"{name}: gnews sources need a keyword list")
+            elif not isinstance(url, str) or not URL_PATTERN.match(url):
+                errors.append(f"{name}: missing or invalid 'url'")
+            schedule = parse_interval(entry.get('schedule'))
+            if schedule is None:
+                errors.append(f"{name}: unreadable schedule {entry.get('schedule')!r}")
+            try:
+                priority = int(entry.get('priority') or 0)
+            except (TypeError, ValueError):
+                errors.append(f"{name}: priority must be an integer")
+                priority = 0
+
+            config = {'type': source_type, 'schedule': schedule or 0, 'priority': priority}
+            if url:
+                config['url'] = url
+            if keywords:
+                config['keywords'] = keywords
+            for field in ('title', 'category'):
+                if entry.get(field):
+                    config[field] = entry[field]
+            sources[name] = config
+
+        if errors:
+            raise CatalogError(f"{source}: {len(errors)} problem(s): " + '; '.join(errors))
+
+        ordered = sorted(sources.items(), key=lambda item: -item[1]['priority'])
+        return cls(dict(ordered))
+
+    def select(self, types=None):
+        """The sources of the given types, in priority order"""
+        return {name: config for name, config in self.sources.items()
+                if types is None or config['type'] in types}
@@ -4,102 +4,95 @@ CRA News Fetcher
 Automatically fetches and processes the latest news about EU Cyber Resilience Act
 """
 
-import requests
 import json
-import feedparser
 from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
 import os
-import time
+
+import http_client
+from article_store import ArticleStore
+from feed_catalog import DEFAULT_FEED_CATALOG_FILE, FeedCatalog
+from keyword_matcher import cra_keywords, matcher_for
+from news_pipeline import (canonicalize, fetch_rss_articles, fetch_sharded, newest, render_key_updates,
+                           report_source_error, shard_count)
+from news_ranking import NewsRanker
+from news_state import SourceStateStore, conditional_headers
+from source_health import SourceHealth
+from web_extractors import extractor_for
+
+# Relevance keywords and weights; the CRA's name counts in every EU language
+RSS_KEYWORDS = cra_keywords({'cra': 1.0, 'eu cybersecurity': 1.0})
+WEB_KEYWORDS = cra_keywords({'cra': 1.0})
 
 class CRANewsFetcher:
-    def __init__(self):
-        self.news_sources = {
-            'eu_official': {
-                'url': 'https://ec.europa.eu/info/law/better-regulation/have-your-say/initiatives/13410-Cyber-resilience-act_en',
-                'type': 'web'
-            },
-            'enisa_news': {
-                'url': 'https://www.enisa.europa.eu/news',
-                'type': 'web'
-            },
-            'cybersecurity_news': {
-                'url': 'https://feeds.feedburner.com/SecurityWeek',
-                'type': 'rss'
-            }
-        }
+    def __init__(self, max_workers=4, catalog_file=DEFAULT_FEED_CATALOG_FILE, processes=None):
+        # Sources with their schedules and priorities; this script polls feeds and web pages
+        self.news_sources = FeedCatalog.load(catalog_file).select(('rss', 'web'))
+        
+        # Sources are fetched concurrently; per-host rate limits live in http_client
+        self.max_workers = max(1, max_workers)
+        
+        # Large catalogs are split across worker processes, each fetching with max_workers threads
+        self.processes = processes or shard_count(len(self.news_sources))
+        
+        # Per-source fetch statistics; sources that keep failing are polled less often
+        self.source_health = SourceHealth('news-source-health.json')
         
         self.output_file = 'docs/news-updates.md'
         self.json_file = 'docs/latest-cra-news.json'
         
-    def fetch_rss_news(self, url, keywords=['cyber resilience act', 'cra', 'eu cybersecurity']):
+        # Feed validators, high-water marks and last relevant articles from previous runs
+        self.feed_state = SourceStateStore('news-feeds.json')
+        
+        # Validators and news-region hashes of scraped web pages
+        self.page_state = SourceStateStore('news-pages.json')
+        
+        # Full article history; each run only writes new or changed articles
+        self.article_store = ArticleStore('news-articles.sqlite3')
+        self.render_limit = 20
+        self.render_days = 30
+        
+        # BM25 index used to choose the "Key Updates"; grows as articles are rendered
+        self.ranker = NewsRanker()
+        
+    def fetch_rss_news(self, url, keywords=RSS_KEYWORDS):
         """Fetch news from RSS feeds"""
-        try:
-            feed = feedparser.parse(url)
-            relevant_articles = []
-            
-            for entry in feed.entries[:20]:  # Limit to recent articles
-                title = entry.title.lower()
-                summary = entry.get('summary', '').lower()
-                
-                if any(keyword in title or keyword in summary for keyword in keywords):
-                    article_date = datetime(*entry.published_parsed[:6]) if hasattr(entry, 'published_parsed') else datetime.now()
-                    
-                    # Only include articles from last 30 days
-                    if article_date > datetime.now() - timedelta(days=30):
-                        relevant_articles.append({
-                            'title': entry.title,
-                            'link': entry.link,
-                            'date': article_date.strftime('%Y-%m-%d'),
-                            'summary': entry.get('summary', '')[:200] + '...' if len(entry.get('summary', '')) > 200 else entry.get('summary', ''),
-                            'source': url
-                        })
-                        
-            return relevant_articles
-        except Exception as e:
-            print(f"Error fetching RSS from {url}: {e}")
-            return []
+        return fetch_rss_articles(url, self.feed_state, keywords, url)
     
-    def fetch_web_content(self, url, keywords=['cyber resilience act', 'cra']):
+    def fetch_web_content(self, url, keywords=WEB_KEYWORDS):
         """Fetch news from web pages"""
+        matcher = matcher_for(keywords)
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            response = requests.get(url, headers=headers, timeout=10)
-            soup = BeautifulSoup(response.content, 'html.parser')
+            # Conditional request where the server supports it, then a hash of the news region
+            state = self.page_state.get(url)
+            response = http_client.get(url, headers=conditional_headers(state))
+            if response.status_code == 304:
+                print(f"Page {url} not modified since last run")
+                self.page_state.update(url)
+                return []
+            response.raise_for_status()
             
-            # Extract recent updates (implementation depends on site structure)
-            articles = []
+            extractor = extractor_for(url)
+            region_hash = extractor.region_hash(response.content)
+            validators = {'etag': response.headers.get('ETag'), 'modified': response.headers.get('Last-Modified')}
+            if region_hash == state.get('region_hash'):
+                # Its items are already in the article store, so nothing downstream needs them again
+                print(f"News region of {url} unchanged since last run")
+                self.page_state.update(url, **validators)
+                return []
             
-            # Look for news items, updates, or recent changes
-            news_elements = soup.find_all(['article', 'div'], class_=['news', 'update', 'announcement'])
-            
-            for element in news_elements[:5]:  # Limit results
-                title_elem = element.find(['h1', 'h2', 'h3', 'h4'])
-                if title_elem:
-                    title = title_elem.get_text().strip()
-                    if any(keyword in title.lower() for keyword in keywords):
-                        articles.append({
-                            'title': title,
-                            'link': url,
-                            'date': datetime.now().strftime('%Y-%m-%d'),
-                            'summary': 'Official EU update on Cyber Resilience Act',
-                            'source': 'EU Official'
-                        })
-                        
+            # Each site's extractor builds only its candidate nodes and reads per-item links and dates
+            articles = [article for article in extractor.extract(response.content, url)
+                        if matcher.is_relevant(article['title'])]
+            self.page_state.update(url, region_hash=region_hash, **validators)
             return articles
         except Exception as e:
-            print(f"Error fetching web content from {url}: {e}")
+            report_source_error(f"Error fetching web content from {url}: {e}")
             return []
     
-    def generate_markdown_update(self, all_articles):
+    def generate_markdown_update(self, all_articles, total_articles=None):
         """Generate markdown content for news updates"""
         if not all_articles:
             return
-            
-        # Sort articles by date (newest first)
-        all_articles.sort(key=lambda x: x['date'], reverse=True)
         
         markdown_content = f"""# Latest CRA News and Updates
 
@@ -113,22 +106,8 @@ The following section is automatically updated with the latest news and developm
 
 """
         
-        current_month = None
-        for article in all_articles[:10]:  # Show top 10 recent articles
-            article_date = datetime.strptime(article['date'], '%Y-%m-%d')
-            month_year = article_date.strftime('%B %Y')
-            
-            if current_month != month_year:
-                current_month = month_year
-                markdown_content += f"\n#### {month_year}\n\n"
-            
-            markdown_content += f"**[{article['title']}]({article['link']})**\n"
-            markdown_content += f"*{article['date']} | Source: {article.get('source', 'Unknown')}*\n\n"
-            
-            if article.get('summary'):
-                markdown_content += f"{article['summary']}\n\n"
-            
-            markdown_content += "---\n\n"
+        # The most relevant items, still listed newest first under their month headings
+        markdown_content += ''.join(render_key_updates(self.ranker.top(all_articles, limit=10)))
         
         markdown_content += f"""
 ## Monitoring Sources
@@ -163,35 +142,49 @@ Latest developments are automatically integrated into:
         with open(self.json_file, 'w', encoding='utf-8') as f:
             json.dump({
                 'last_updated': datetime.now().isoformat(),
-                'articles': all_articles[:20],
-                'total_articles': len(all_articles)
+                'articles': newest(all_articles, 20),
+                'total_articles': len(all_articles) if total_articles is None else total_articles
             }, f, indent=2)
         
         print(f"Generated news update with {len(all_articles)} articles")
     
+    def fetch_source(self, source):
+        """Fetch articles from one (source_name, source_config) entry"""
+        source_name, source_config = source
+        print(f"Fetching from {source_name}...")
+        
+        articles = []
+        if source_config['type'] == 'rss':
+            articles = self.fetch_rss_news(source_config['url'])
+        elif source_config['type'] == 'web':
+            articles = self.fetch_web_content(source_config['url'])
+        return articles
+    
     def run(self):
         """Main execution function"""
         print("Starting CRA news fetch...")
-        all_articles = []
-        
-        for source_name, source_config in self.news_sources.items():
-            print(f"Fetching from {source_name}...")
-            
-            if source_config['type'] == 'rss':
-                articles = self.fetch_rss_news(source_config['url'])
-            elif source_config['type'] == 'web':
-                articles = self.fetch_web_content(source_config['url'])
-            
-            all_articles.extend(articles)
-            time.sleep(1)  # Be respectful to servers
+        sources = self.source_health.due_sources(self.news_sources.items())
+        all_articles = list(canonicalize(fetch_sharded(sources, self.fetch_source, self.max_workers, self.processes,
+                                                       self.source_health, (self.feed_state, self.page_state))))
         
         print(f"Found {len(all_articles)} relevant articles")
+        self.feed_state.save()
+        self.page_state.save()
+        self.source_health.save()
+        self.source_health.report()
+        
+        inserted, updated = self.article_store.upsert(all_articles)
+        print(f"Article store: {inserted} new, {updated} changed, {self.article_store.count()} total")
+        # The update shows the last 30 days; older articles stay in the store
+        since = (datetime.now() - timedelta(days=self.render_days)).strftime('%Y-%m-%d')
+        articles = self.article_store.query(limit=self.render_limit, since=since)
         
-        if all_articles:
-            self.generate_markdown_update(all_articles)
+        if articles:
+            self.generate_markdown_update(articles, total_articles=self.article_store.count())
             print("News update completed successfully")
         else:
             print("No new articles found")
+        self.article_store.close()
 
 if __name__ == "__main__":
     fetcher = CRANewsFetcher()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Google News Source
+Keyword fan-out over Google News RSS search: per-(keyword, period) response
+cache, concurrent queries for the keywords that miss it, a cross-keyword merge
+before any parsing, and a date parser that remembers each publisher's format
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+import feedparser
+from bs4 import BeautifulSoup
+
+import http_client
+from article_store import canonical_url
+from near_duplicates import normalize_text
+from news_pipeline import report_source_error
+from news_state import SourceStateStore
+
+GNEWS_PERIOD = '30d'
+GNEWS_SEARCH_URL = 'https://news.google.com/rss/search'
+GNEWS_DATE_FORMATS = ['%a, %d %b %Y %H:%M:%S %Z', '%Y-%m-%d', '%d %b %Y']
+
+def gnews_search_url(keyword, period=GNEWS_PERIOD, language='en', country='US'):
+    """Google News RSS search URL for a keyword over the last period"""
+    query = urlencode({'q': f"{keyword} when:{period}", 'hl': language, 'gl': country,
+                       'ceid': f"{country}:{language}"})
+    return f"{GNEWS_SEARCH_URL}?{query}"
+
+def search_gnews(keyword, period=GNEWS_PERIOD, max_results=10, language='en', country='US'):
+    """Items of a Google News search, shaped like the gnews library's; raises when the search fails
+
+    The search goes through http_client, so it is retried and counted by the
+    news.google.com breaker like any other source.
+    """
+    response = http_client.get(gnews_search_url(keyword, period, language, country))
+    response.raise_for_status()
+    feed = feedparser.parse(response.content)
+    if feed.bozo and not feed.entries:
+        raise ValueError(f"unreadable Google News feed: {feed.get('bozo_exception')}")
+    return [{
+        'title': entry.get('title', ''),
+        'description': BeautifulSoup(entry.get('description', ''), 'html.parser').get_text().replace('\xa0', ' '),
+        'published date': entry.get('published', ''),
+        'url': entry.get('link'),
+        'publisher': dict(entry.get('source') or {})
+    } for entry in feed.entries[:max_results] if entry.get('link')]
+
+class PublishedDateParser:
+    """strptime over a few formats, trying first the one that last worked for the publisher"""
+
+    def __init__(self, formats=GNEWS_DATE_FORMATS, max_cached=4096):
+        self.formats = list(formats)
+        self.max_cached = max_cached
+        self.last_format = {}
+        self.parsed = {}
+
+    def parse(self, text, publisher=None):
+        """Datetime for a published-date string, or None when no format fits"""
+        if not text:
+            return None
+        key = (publisher, text)
+        if key in self.parsed:
+            return self.parsed[key]
+
+        remembered = self.last_format.get(publisher)
+        formats = [remembered] + [f for f in self.formats if f != remembered] if remembered else self.formats
+        result = None
+        for date_format in formats:
+            try:
+                result = datetime.strptime(text, date_format)
+            except ValueError:
+                continue
+            self.last_format[publisher] = date_format
+            break
+
+        # Items repeat across keywords and cached runs, so the same strings come back often
+        if len(self.parsed) >= self.max_cached:
+            self.parsed.clear()
+        self.parsed[key] = result
+        return result
+
+class KeywordResponseCache:
+    """GNews results per (keyword, period), reused until they are older than the TTL"""
+
+    def __init__(self, filename='gnews-responses.json', directory=None, ttl_hours=12):
+        self.store = SourceStateStore(filename, directory)
+        self.ttl = timedelta(hours=ttl_hours)
+
+    @staticmethod
+    def key(keyword, period):
+        """State key of a query"""
+        return f"{period}|{keyword}"
+
+    def get(self, keyword, period):
+        """Cached items for a query, or None when missing or expired"""
+        state = self.store.get(self.key(keyword, period))
+        fetched_at = state.get('fetched_at')
+        if not fetched_at or datetime.fromisoformat(fetched_at) < datetime.now() - self.ttl:
+            return None
+        return state.get('items', [])
+
+    def put(self, keyword, period, items):
+        """Remember a query's items"""
+        self.store.update(self.key(keyword, period), items=list(items), fetched_at=datetime.now().isoformat())
+
+    def save(self):
+        """Write the cache atomically"""
+        self.store.save()
+
+def fetch_keyword_results(keywords, fetch_keyword, cache, period=GNEWS_PERIOD, max_workers=1):
+    """Items for every keyword, in keyword order; only cache misses are queried, concurrently"""
+    results = {}
+    missing = []
+    for keyword in keywords:
+        cached = cache.get(keyword, period)
+        if cached is None:
+            missing.append(keyword)
+        else:
+            print(f"Using cached GNews results for keyword: {keyword}")
+            results[keyword] = cached
+
+    def fetch(keyword):
+        try:
+            return fetch_keyword(keyword)
+        except Exception as e:
+            print(f"Error fetching from GNews for keyword '{keyword}': {e}")
+            return None
+
+    if missing:
+        failed = 0
+        with ThreadPoolExecutor(max_workers=min(max(1, max_workers), len(missing))) as executor:
+            for keyword, items in zip(missing, executor.map(fetch, missing)):
+                # Failed and empty queries are not cached, so the next run retries them
+                if items is None:
+                    failed += 1
+                elif items:
+                    cache.put(keyword, period, items)
+                else:
+                    print(f"No GNews results for keyword: {keyword}")
+                results[keyword] = items or []
+        if failed == len(missing):
+            report_source_error(f"Every live GNews keyword query failed ({failed} of {len(keywords)} keywords)")
+    return [results[keyword] for keyword in keywords]
+
+def merge_keyword_results(keyword_results):
+    """Yield each item once, dropping ones another keyword already returned by URL or title"""
+    seen_urls = set()
+    seen_titles = set()
+    for items in keyword_results:
+        for item in items:
+            url = canonical_url(item.get('url'))
+            title = normalize_text(item.get('title'))
+            if (url and url in seen_urls) or (title and title in seen_titles):
+                continue
+            if url:
+                seen_urls.add(url)
+            if title:
+                seen_titles.add(title)
+            yield item
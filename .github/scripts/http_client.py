@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP Client
+Pooled keep-alive session with retries, backoff, per-host rate limiting and
+circuit breaking for the CRA news, document and wiki scripts
+"""
+
+import os
+import random
+import socket
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive'
+}
+
+# (connect, read) seconds; a short connect timeout keeps dead hosts from stalling a run
+DEFAULT_TIMEOUT = (10, 30)
+
+# Number of hosts with cached pools, and keep-alive connections kept per host
+POOL_CONNECTIONS = 16
+POOL_MAXSIZE = 16
+
+# Simultaneous in-flight requests allowed to a single host
+PER_HOST_LIMIT = 4
+
+# (requests per second, burst) by domain; a host uses the entry for itself or its closest
+# parent domain, and hosts with no entry are not rate limited
+HOST_RATE_LIMITS = {
+    'europa.eu': (2.0, 4),
+    'news.google.com': (2.0, 4),
+    'feeds.feedburner.com': (2.0, 4)
+}
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of calling a host whose circuit breaker is open"""
+
+class RetryPolicy:
+    """Jittered exponential backoff settings"""
+
+    def __init__(self, max_attempts=4, backoff_base=1.0, backoff_max=30.0, max_retry_after=120.0,
+                 retry_statuses=(429, 500, 502, 503, 504)):
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_retry_after = max_retry_after
+        self.retry_statuses = frozenset(retry_statuses)
+
+    def backoff(self, attempt):
+        """Delay before retry number `attempt` (1-based), using full jitter"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1))))
+
+class CircuitBreaker:
+    """Stops calling a host after repeated failed requests, each counted once after its retries"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=300.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = {}
+        self._reopen_at = {}
+        self._probing = set()
+        self._lock = threading.Lock()
+
+    def allow(self, host):
+        """Return True if a new request to the host may start"""
+        with self._lock:
+            if host in self._probing:
+                return False
+            reopen_at = self._reopen_at.get(host)
+            if reopen_at is None:
+                return True
+            if time.monotonic() >= reopen_at:
+                # Half-open: this caller is the single trial request; the rest wait for its outcome
+                del self._reopen_at[host]
+                self._probing.add(host)
+                return True
+            return False
+
+    def is_open(self, host):
+        """Whether the circuit is open, so a request in progress should stop retrying"""
+        with self._lock:
+            return host in self._reopen_at
+
+    def record_success(self, host):
+        """Reset the failure count after a successful request"""
+        with self._lock:
+            self._failures.pop(host, None)
+            self._reopen_at.pop(host, None)
+            self._probing.discard(host)
+
+    def record_failure(self, host):
+        """Count a failed request and open the circuit at the threshold or when a trial request fails"""
+        with self._lock:
+            self._failures[host] = self._failures.get(host, 0) + 1
+            probe_failed = host in self._probing
+            self._probing.discard(host)
+            if (self._failures[host] >= self.failure_threshold or probe_failed) and host not in self._reopen_at:
+                print(f"Circuit breaker opened for {host} after {self._failures[host]} failed requests")
+                self._reopen_at[host] = time.monotonic() + self.reset_timeout
+
+    def trip(self, host, seconds):
+        """Open the circuit for at least `seconds`, e.g. when the host asks for a longer wait than we allow"""
+        with self._lock:
+            self._probing.discard(host)
+            self._reopen_at[host] = max(self._reopen_at.get(host, 0.0), time.monotonic() + seconds)
+
+class TokenBucket:
+    """Token bucket allowing `rate` requests per second with bursts of up to `burst`"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1.0, float(burst))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available; returns the seconds spent waiting"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def drain(self):
+        """Drop any saved-up burst"""
+        with self._lock:
+            self.tokens = 0.0
+            self.updated = time.monotonic()
+
+class RateLimiter:
+    """Per-host token buckets configured by domain, plus server-requested pauses for any host"""
+
+    def __init__(self, limits=None):
+        self.limits = dict(HOST_RATE_LIMITS if limits is None else limits)
+        self._buckets = {}
+        self._paused_until = {}
+        self._lock = threading.Lock()
+
+    def limit_for(self, host):
+        """(rate, burst) for a host from its own or closest parent domain entry, or None"""
+        labels = host.split(':')[0].split('.')
+        for index in range(len(labels)):
+            limit = self.limits.get('.'.join(labels[index:]))
+            if limit:
+                return limit
+        return None
+
+    def bucket(self, host):
+        """The host's bucket, or None when the host is not limited"""
+        with self._lock:
+            if host not in self._buckets:
+                limit = self.limit_for(host)
+                self._buckets[host] = TokenBucket(*limit) if limit else None
+            return self._buckets[host]
+
+    def acquire(self, host):
+        """Wait out any pause and for the host's next token; returns the seconds waited"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                delay = self._paused_until.get(host, 0.0) - time.monotonic()
+            if delay <= 0:
+                break
+            time.sleep(delay)
+            waited += delay
+        bucket = self.bucket(host)
+        return waited + (bucket.acquire() if bucket else 0.0)
+
+    def pause(self, host, seconds):
+        """Hold every request to a host, e.g. for a 429 or a short Retry-After, whether limited or not"""
+        with self._lock:
+            self._paused_until[host] = max(self._paused_until.get(host, 0.0), time.monotonic() + seconds)
+        bucket = self.bucket(host)
+        if bucket:
+            bucket.drain()
+
+def parse_retry_after(value):
+    """Convert a Retry-After header (seconds or HTTP date) to seconds, or None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+# Connection setup timings of the current thread's most recent request
+_connect_timing = threading.local()
+
+class TimedHTTPConnection(HTTPConnection):
+    """HTTP connection that records DNS and TCP connect time"""
+
+    def connect(self):
+        _timed_connect(self, HTTPConnection.connect)
+
+class TimedHTTPSConnection(HTTPSConnection):
+    """HTTPS connection that records DNS and TCP+TLS connect time"""
+
+    def connect(self):
+        _timed_connect(self, HTTPSConnection.connect)
+
+def _timed_connect(connection, connect):
+    """Time the host's name lookup, then the connection itself
+
+    Only the public connect() is wrapped, so any urllib3 release works. The
+    connection repeats the lookup, which the resolver cache then answers.
+    """
+    start = time.perf_counter()
+    try:
+        socket.getaddrinfo(connection.host, connection.port, type=socket.SOCK_STREAM)
+    except OSError:
+        pass  # let the real connect report the resolution failure
+    resolved = time.perf_counter()
+    connect(connection)
+    _connect_timing.dns_ms = (resolved - start) * 1000
+    _connect_timing.connect_ms = (time.perf_counter() - resolved) * 1000
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """Adapter whose pools use the timed connection classes"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool
+        }
+
+def build_session(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE):
+    """Create a keep-alive session with connection pools sized for concurrent fetching"""
+    session = requests.Session()
+    # Retries are handled by HttpFetcher, so urllib3 must not retry on its own
+    adapter = TimedHTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+def cassette_adapter(session):
+    """The record/replay adapter mounted on a session by replay_harness, or None"""
+    adapter = session.get_adapter('https://')
+    return adapter if getattr(adapter, 'cassette', None) is not None else None
+
+def renew_session(fetcher=None):
+    """Give a fetcher fresh connection pools (e.g. in a forked worker), keeping any cassette adapter"""
+    fetcher = fetcher or default_fetcher
+    adapter = cassette_adapter(fetcher.session)
+    fetcher.session = build_session()
+    if adapter is not None:
+        fetcher.session.mount('https://', adapter)
+        fetcher.session.mount('http://', adapter)
+
+def host_of(url):
+    """Lower-cased host[:port] of a URL, used as the breaker and limiter key"""
+    return urlparse(url).netloc.lower()
+
+class HttpFetcher:
+    """Retrying HTTP client over a pooled session, with per-host rate limits and circuit breaker"""
+
+    def __init__(self, policy=None, breaker=None, session=None, timeout=DEFAULT_TIMEOUT,
+                 per_host_limit=PER_HOST_LIMIT, rate_limiter=None):
+        self.policy = policy or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.session = session or build_session()
+        self.timeout = timeout
+        self.per_host_limit = max(1, per_host_limit)
+        self._host_slots = {}
+        self._host_slots_lock = threading.Lock()
+
+    def host_slot(self, host):
+        """Semaphore capping concurrent requests to a host across all threads"""
+        with self._host_slots_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_slots[host]
+
+    def get(self, url, **kwargs):
+        """GET a URL, retrying transient failures; returns the final response
+
+        The response carries a `fetch_stats` dict with dns_ms and connect_ms (0 when a
+        pooled connection was reused), ttfb_ms and the number of retries.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        stats = {'attempts': 0}
+
+        def attempt():
+            stats['attempts'] += 1
+            _connect_timing.dns_ms = _connect_timing.connect_ms = 0.0
+            start = time.perf_counter()
+            response = self.session.get(url, **kwargs)
+            stats.update({
+                'dns_ms': _connect_timing.dns_ms,
+                'connect_ms': _connect_timing.connect_ms,
+                'ttfb_ms': (time.perf_counter() - start) * 1000 if kwargs.get('stream')
+                           else response.elapsed.total_seconds() * 1000
+            })
+            return response
+
+        response = self.call(host_of(url), attempt)
+        response.fetch_stats = {
+            'dns_ms': round(stats['dns_ms'], 3),
+            'connect_ms': round(stats['connect_ms'], 3),
+            'ttfb_ms': round(stats['ttfb_ms'], 3),
+            'retries': stats['attempts'] - 1
+        }
+        return response
+
+    def post(self, url, **kwargs):
+        """POST once through the pooled session; not retried since POSTs are not idempotent"""
+        kwargs.setdefault('timeout', self.timeout)
+        host = host_of(url)
+        if not self.breaker.allow(host):
+            raise CircuitOpenError(f"circuit open for {host}, skipping request")
+        self.rate_limiter.acquire(host)
+        return self.session.post(url, **kwargs)
+
+    def call(self, host, func):
+        """Run func() for a host with retries; func returns a response or raises
+
+        The breaker sees one outcome per call, after its retries, so transient errors
+        that a retry absorbs never open it.
+        """
+        if not self.breaker.allow(host):
+            raise CircuitOpenError(f"circuit open for {host}, skipping request")
+
+        last_error = None
+        for attempt in range(1, self.policy.max_attempts + 1):
+            if attempt > 1 and self.breaker.is_open(host):
+                raise CircuitOpenError(f"circuit open for {host}, skipping request")
+
+            try:
+                # Politeness comes from the host's token bucket and concurrency cap;
+                # waiting for a token and backoff sleeps happen outside the cap
+                self.rate_limiter.acquire(host)
+                with self.host_slot(host):
+                    result = func()
+            except CircuitOpenError:
+                raise
+            except Exception as e:
+                last_error = e
+                if attempt == self.policy.max_attempts:
+                    self.breaker.record_failure(host)
+                    raise
+                delay = self.policy.backoff(attempt)
+                print(f"Request to {host} failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            status = getattr(result, 'status_code', None)
+            if status not in self.policy.retry_statuses:
+                self.breaker.record_success(host)
+                return result
+
+            if attempt == self.policy.max_attempts:
+                self.breaker.record_failure(host)
+                return result
+
+            delay = self.policy.backoff(attempt)
+            retry_after = parse_retry_after(result.headers.get('Retry-After'))
+            if retry_after is not None:
+                if retry_after > self.policy.max_retry_after:
+                    # Sleeping that long would stall every request to the host; fail them at once instead
+                    print(f"{host} asked to retry after {retry_after:.0f}s, giving up for this run")
+                    self.breaker.trip(host, retry_after)
+                    return result
+                delay = max(delay, retry_after)
+            if status == 429 or retry_after is not None:
+                # Slow every thread's requests to this host, not just this retry
+                self.rate_limiter.pause(host, delay)
+
+            result.close()
+            print(f"{host} returned HTTP {status}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+        raise last_error
+
+# Shared by every script so breaker state covers the whole run
+default_fetcher = HttpFetcher()
+
+def get(url, **kwargs):
+    """GET through the shared fetcher"""
+    return default_fetcher.get(url, **kwargs)
+
+def post(url, **kwargs):
+    """POST through the shared fetcher's session"""
+    return default_fetcher.post(url, **kwargs)
+
+if os.environ.get('CRA_HTTP_CASSETTE'):
+    # Offline record/replay for tests and benchmarks; see replay_harness.py
+    import replay_harness
+    replay_harness.install_from_environment(default_fetcher)
@@ -4,11 +4,12 @@ Initialize GitHub Wiki with comprehensive CRA content
 Creates all necessary wiki pages for the EU Cyber Resilience Act compliance hub
 """
 
-import requests
 import json
 import os
 from datetime import datetime
 
+import http_client
+
 class WikiInitializer:
     def __init__(self):
         self.github_token = os.environ.get('GITHUB_TOKEN')
@@ -126,7 +127,7 @@ This issue contains the content for the `{page_name}` wiki page.
                 'labels': ['documentation', 'wiki-content', 'auto-generated']
             }
             
-            response = requests.post(api_url, headers=headers, json=issue_data)
+            response = http_client.post(api_url, headers=headers, json=issue_data)
             if response.status_code == 201:
                 issue_url = response.json().get('html_url')
                 print(f"Created documentation issue for {page_name}: {issue_url}")
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+News Keyword Matcher
+Weighted multi-keyword relevance matching compiled into a single word-boundary
+regex (a keyword trie), including the CRA's name in every official EU language
+"""
+
+import re
+import threading
+
+# "Cyber Resilience Act" in the 24 official EU languages. A '*' after a word allows any
+# word ending, for inflected and compound forms (aktu, förordningen, ...)
+CRA_NAMES = {
+    'bg': ['акт за киберустойчивост*'],
+    'cs': ['akt* o kybernetické odolnosti'],
+    'da': ['cyberrobusthedsforordning*', 'forordning* om cyberrobusthed'],
+    'de': ['cyberresilienzgesetz*', 'cyberresilienz-verordnung*', 'verordnung über cyberresilienz'],
+    'el': ['πράξη για την κυβερνοανθεκτικότητα', 'πράξης για την κυβερνοανθεκτικότητα'],
+    'en': ['cyber resilience act'],
+    'es': ['ley de ciberresiliencia', 'reglamento de ciberresiliencia'],
+    'et': ['küberkerksuse määrus*', 'küberturvalisuse kerksuse määrus*'],
+    'fi': ['kyberresilienssisäädö*', 'kyberkestävyysasetu*'],
+    'fr': ['règlement sur la cyberrésilience', 'loi sur la cyberrésilience'],
+    'ga': ['gníomh um athléimneacht chibear*'],
+    'hr': ['akt* o kibernetičkoj otpornosti'],
+    'hu': ['kiberreziliencia-jogszabály*', 'kiberrezilienciáról szóló jogszabály*'],
+    'it': ['legge sulla ciberresilienza', 'regolamento sulla ciberresilienza'],
+    'lt': ['kibernetinio atsparumo akt*'],
+    'lv': ['kibernoturības akt*'],
+    'mt': ['att dwar ir-reżiljenza ċibernetika'],
+    'nl': ['cyberweerbaarheidsverordening*'],
+    'pl': ['akt* o cyberodporności'],
+    'pt': ['regulamento de ciber-resiliência', 'lei da ciber-resiliência', 'regulamento de ciberresiliência'],
+    'ro': ['act* privind reziliența cibernetică', 'act* privind rezilienţa cibernetică'],
+    'sk': ['akt* o kybernetickej odolnosti'],
+    'sl': ['akt* o kibernetski odpornosti'],
+    'sv': ['cyberresiliensförordning*', 'förordning* om cyberresiliens']
+}
+
+def cra_keywords(extra=None, name_weight=3.0):
+    """Weighted keyword set with every language variant of the CRA's name plus extra terms"""
+    keywords = {name: name_weight for names in CRA_NAMES.values() for name in names}
+    if isinstance(extra, dict):
+        keywords.update(extra)
+    elif extra:
+        keywords.update({keyword: 1.0 for keyword in extra})
+    return keywords
+
+_SEPARATOR = r'[\s-]+'
+_WORD_ENDING = r'\w*'
+
+def keyword_atoms(keyword):
+    """Regex atoms for one keyword: escaped characters, word separators and '*' endings"""
+    atoms = []
+    for position, word in enumerate(re.split(r'[\s-]+', keyword.strip().lower())):
+        if position:
+            atoms.append(_SEPARATOR)
+        if word.endswith('*'):
+            atoms.extend(re.escape(char) for char in word[:-1])
+            atoms.append(_WORD_ENDING)
+        else:
+            atoms.extend(re.escape(char) for char in word)
+    return atoms
+
+def trie_pattern(keywords):
+    """Regex source for all keywords with shared prefixes factored into a trie"""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for atom in keyword_atoms(keyword):
+            node = node.setdefault(atom, {})
+        node[None] = True
+
+    def emit(node):
+        branches = [atom + emit(child) for atom, child in node.items() if atom is not None]
+        if not branches:
+            return ''
+        source = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # A keyword ending here makes the longer continuations optional (greedy, so longest wins)
+        return f"(?:{source})?" if None in node else source
+
+    return r'(?<!\w)' + emit(trie) + r'(?!\w)' if trie else r'(?!)'
+
+class KeywordMatcher:
+    """All keywords of a set compiled into one trie-shaped regex, scanned in a single pass"""
+
+    def __init__(self, keywords, min_score=1.0):
+        if not isinstance(keywords, dict):
+            keywords = {keyword: 1.0 for keyword in keywords}
+        self.weights = dict(keywords)
+        self.min_score = min_score
+        # A plain alternation retries every keyword at every position; the trie shares prefixes
+        self.pattern = re.compile(trie_pattern(self.weights), re.IGNORECASE)
+        # Used only on matched spans, to tell which keyword (and weight) produced them
+        self._exact = [(keyword, re.compile(''.join(keyword_atoms(keyword)), re.IGNORECASE))
+                       for keyword in self.weights]
+
+    def matches(self, *texts):
+        """Distinct keywords found in the texts"""
+        found = set()
+        for text in texts:
+            if text:
+                for match in self.pattern.finditer(text):
+                    found.update(keyword for keyword, exact in self._exact if exact.fullmatch(match.group(0)))
+        return found
+
+    def score(self, *texts):
+        """Sum of the weights of the distinct keywords found"""
+        return sum(self.weights[keyword] for keyword in self.matches(*texts))
+
+    def is_relevant(self, *texts):
+        """Whether the texts score at least min_score"""
+        # Most entries match nothing, and search() stops at the first hit
+        if not any(text and self.pattern.search(text) for text in texts):
+            return False
+        return self.score(*texts) >= self.min_score
+
+_matchers = {}
+_matchers_lock = threading.Lock()
+
+def matcher_for(keywords, min_score=1.0):
+    """Shared matcher for a keyword list or weight dict, compiled on first use"""
+    items = keywords.items() if isinstance(keywords, dict) else ((keyword, 1.0) for keyword in keywords)
+    key = (frozenset(items), min_score)
+    with _matchers_lock:
+        matcher = _matchers.get(key)
+        if matcher is None:
+            matcher = _matchers[key] = KeywordMatcher(dict(key[0]), min_score)
+    return matcher
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Article Index
+MinHash signatures with LSH banding over title and summary shingles, so each new
+article is compared only against a handful of likely duplicates
+"""
+
+import random
+import re
+import zlib
+from difflib import SequenceMatcher
+
+# Character shingles for titles (robust to " - Reuters" style suffixes), word shingles for summaries
+TITLE_SHINGLE_SIZE = 4
+SUMMARY_SHINGLE_SIZE = 3
+MIN_SUMMARY_WORDS = 8
+
+# 16 bands of 2 rows: pairs with Jaccard similarity above ~0.4 almost always share a bucket,
+# and the exact title comparison then confirms or rejects each candidate
+NUM_PERMUTATIONS = 32
+BANDS = 16
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+                 for _ in range(NUM_PERMUTATIONS)]
+
+_NON_WORD = re.compile(r'[\W_]+', re.UNICODE)
+
+def normalize_text(text):
+    """Lower-case and collapse punctuation and whitespace"""
+    return _NON_WORD.sub(' ', (text or '').lower()).strip()
+
+def char_shingles(text, size=TITLE_SHINGLE_SIZE):
+    """Set of overlapping character n-grams"""
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+def word_shingles(text, size=SUMMARY_SHINGLE_SIZE):
+    """Set of overlapping word n-grams"""
+    words = text.split()
+    if len(words) <= size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def minhash(shingles):
+    """MinHash signature of a shingle set, or None for an empty set"""
+    if not shingles:
+        return None
+    hashes = [zlib.crc32(shingle.encode('utf-8')) for shingle in shingles]
+    return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+def estimated_jaccard(signature_a, signature_b):
+    """Fraction of matching MinHash rows, an unbiased estimate of Jaccard similarity"""
+    return sum(1 for a, b in zip(signature_a, signature_b) if a == b) / len(signature_a)
+
+class NearDuplicateIndex:
+    """LSH index that flags articles whose title nearly matches one already kept
+
+    Title and summary signatures only select candidates; a candidate is a duplicate when
+    its title ratio exceeds the threshold, or, if summary_threshold is set, when the
+    summaries alone are that similar.
+    """
+
+    def __init__(self, threshold=0.85, bands=BANDS, summary_threshold=None):
+        self.threshold = threshold
+        self.summary_threshold = summary_threshold
+        self.bands = bands
+        self.rows = NUM_PERMUTATIONS // bands
+        self._buckets = {}
+        self._items = []
+
+    def _band_keys(self, kind, signature):
+        for band in range(self.bands):
+            start = band * self.rows
+            yield (kind, band, signature[start:start + self.rows])
+
+    def _match_reason(self, title, summary_signature, candidate):
+        kept_title, kept_summary_signature = self._items[candidate]
+        matcher = SequenceMatcher(None, title.lower(), kept_title.lower())
+        # quick_ratio() is an upper bound on ratio(), so it can reject cheaply
+        if matcher.quick_ratio() > self.threshold and matcher.ratio() > self.threshold:
+            return 'title'
+        # Feeds reuse boilerplate summaries, so matching on summaries alone is opt-in
+        if (self.summary_threshold is not None and summary_signature is not None
+                and kept_summary_signature is not None
+                and estimated_jaccard(summary_signature, kept_summary_signature) >= self.summary_threshold):
+            return 'summary'
+        return None
+
+    def check_and_add(self, title, summary=''):
+        """Return (position, reason) of a kept near-duplicate, or add the article and return None"""
+        title_signature = minhash(char_shingles(normalize_text(title)))
+        normalized_summary = normalize_text(summary)
+        summary_signature = None
+        if len(normalized_summary.split()) >= MIN_SUMMARY_WORDS:
+            summary_signature = minhash(word_shingles(normalized_summary))
+
+        keys = []
+        if title_signature is not None:
+            keys.extend(self._band_keys('title', title_signature))
+        if summary_signature is not None:
+            keys.extend(self._band_keys('summary', summary_signature))
+
+        candidates = set()
+        for key in keys:
+            candidates.update(self._buckets.get(key, ()))
+        for candidate in sorted(candidates):
+            reason = self._match_reason(title, summary_signature, candidate)
+            if reason is not None:
+                return candidate, reason
+
+        position = len(self._items)
+        self._items.append((title, summary_signature))
+        for key in keys:
+            self._buckets.setdefault(key, []).append(position)
+        return None
+
+    def __len__(self):
+        return len(self._items)
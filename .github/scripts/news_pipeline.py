@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+News Pipeline Stages
+Generator stages shared by CRANewsFetcher and WikiNewsUpdater:
+source -> parse -> relevance filter -> canonicalize -> dedup -> rank/top-K -> render
+"""
+
+import heapq
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import feedparser
+
+import http_client
+from article_store import canonical_url
+from canonical_urls import resolve_redirect, strip_tracking
+from keyword_matcher import matcher_for
+from near_duplicates import NearDuplicateIndex
+from news_state import conditional_headers, merge_recent_articles
+
+SUMMARY_LENGTH = 200
+
+# Catalog size at which fetching is split across another worker process
+SOURCES_PER_PROCESS = 50
+
+def truncate_summary(summary, length=SUMMARY_LENGTH):
+    """Summary cut to length characters, marked with an ellipsis when cut"""
+    summary = summary or ''
+    return summary[:length] + '...' if len(summary) > length else summary
+
+# Source stage
+
+# Failure reported by the source being fetched on this thread; sources fall back to cached articles
+_source_errors = threading.local()
+
+def report_source_error(message):
+    """Print a fetch failure and mark the source being fetched on this thread as failed"""
+    print(message)
+    _source_errors.message = message
+
+def fetch_tracked(source, fetch_source, health=None):
+    """Articles of one (name, config) source, with the outcome recorded in the health stats"""
+    _source_errors.message = None
+    start = time.perf_counter()
+    articles = list(fetch_source(source))
+    if health is not None:
+        health.record(source[0], _source_errors.message, time.perf_counter() - start, len(articles))
+    return articles
+
+def fetch_sources(sources, fetch_source, max_workers=1, health=None):
+    """Yield articles from every source, in source order even when fetched concurrently"""
+    if max_workers <= 1:
+        for source in sources:
+            yield from fetch_tracked(source, fetch_source, health)
+        return
+    with ThreadPoolExecutor(max_workers=min(max_workers, max(1, len(sources)))) as executor:
+        for articles in executor.map(lambda source: fetch_tracked(source, fetch_source, health), sources):
+            yield from articles
+
+def source_host(source):
+    """Host a (name, config) source is fetched from"""
+    name, config = source
+    if config.get('type') == 'gnews':
+        return 'news.google.com'
+    return http_client.host_of(config.get('url', '')) or name
+
+def plan_shards(sources, shards):
+    """Split sources into at most `shards` lists, keeping each host's sources together
+
+    Rate limits and circuit breakers are per process, so a host must not be
+    polled from two shards at once.
+    """
+    by_host = {}
+    for source in sources:
+        by_host.setdefault(source_host(source), []).append(source)
+    plan = [[] for _ in range(max(1, min(shards, len(by_host))))]
+    for group in sorted(by_host.values(), key=len, reverse=True):
+        min(plan, key=len).extend(group)
+    # Within a shard, sources keep their catalog (priority) order
+    order = {id(source): index for index, source in enumerate(sources)}
+    return [sorted(shard, key=lambda source: order[id(source)]) for shard in plan if shard]
+
+def shard_count(source_count, sources_per_process=SOURCES_PER_PROCESS):
+    """Worker processes worth starting for a number of sources"""
+    return max(1, min(os.cpu_count() or 1, -(-source_count // sources_per_process)))
+
+# Set before forking so workers inherit the fetch function and state instead of pickling them
+_shard_job = None
+
+def _fetch_shard(index):
+    shards, fetch_source, max_workers, health, shared_state = _shard_job
+    # Connections pooled by the parent must not be shared with it; a replay cassette stays mounted
+    http_client.renew_session()
+    articles = list(fetch_sources(shards[index], fetch_source, max_workers, health))
+    stores = list(shared_state) + ([health.store] if health is not None else [])
+    return articles, [store.sources for store in stores]
+
+def fetch_sharded(sources, fetch_source, max_workers=1, processes=1, health=None, shared_state=()):
+    """Yield articles from every source, split across worker processes with threads inside each
+
+    State stores updated by fetch_source (feed validators, page hashes, caches)
+    are passed as shared_state so the workers' updates are merged back.
+    """
+    global _shard_job
+    shards = plan_shards(sources, processes) if processes > 1 else []
+    if len(shards) <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+        yield from fetch_sources(sources, fetch_source, max_workers, health)
+        return
+    if getattr(http_client.cassette_adapter(http_client.default_fetcher.session), 'records', False):
+        # Interactions recorded in worker processes would be lost when they exit
+        print("Recording a cassette; fetching all sources in this process")
+        yield from fetch_sources(sources, fetch_source, max_workers, health)
+        return
+
+    print(f"Fetching {len(sources)} sources in {len(shards)} worker processes")
+    _shard_job = (shards, fetch_source, max_workers, health, shared_state)
+    try:
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=len(shards), mp_context=context) as executor:
+            for articles, states in executor.map(_fetch_shard, range(len(shards))):
+                stores = list(shared_state) + ([health.store] if health is not None else [])
+                for store, state in zip(stores, states):
+                    store.merge(state)
+                yield from articles
+    finally:
+        _shard_job = None
+
+# Parse and filter stages
+
+class HighWaterMark:
+    """Skips feed entries published at or before the previous run's newest entry"""
+
+    def __init__(self, previous):
+        self.previous = previous
+        self.newest = previous
+
+    def unseen(self, entries):
+        """Yield (entry, published) for entries newer than the mark; undated entries always pass"""
+        for entry in entries:
+            if entry.get('published_parsed'):
+                published = datetime(*entry.published_parsed[:6])
+                stamp = published.isoformat()
+                if self.previous and stamp <= self.previous:
+                    continue
+                self.newest = max(self.newest or stamp, stamp)
+            else:
+                published = datetime.now()
+            yield entry, published
+
+def relevant_entries(dated_entries, matcher):
+    """Keep feed entries whose title or summary matches the keyword set"""
+    for entry, published in dated_entries:
+        if matcher.is_relevant(entry.get('title', ''), entry.get('summary', '')):
+            yield entry, published
+
+def entry_articles(dated_entries, source_label, days=30):
+    """Turn recent feed entries into article dicts"""
+    cutoff = datetime.now() - timedelta(days=days)
+    for entry, published in dated_entries:
+        if published > cutoff:
+            yield {
+                'title': entry.get('title', ''),
+                'link': entry.get('link', '#'),
+                'date': published.strftime('%Y-%m-%d'),
+                'summary': truncate_summary(entry.get('summary', '')),
+                'source': source_label
+            }
+
+def fetch_rss_articles(url, feed_state, keywords, source_label, max_entries=20):
+    """Relevant articles of an RSS feed, fetched conditionally and merged with the feed's cached articles"""
+    matcher = matcher_for(keywords)
+    try:
+        # Conditional request: an unchanged feed costs one 304 and no parsing
+        state = feed_state.get(url)
+        response = http_client.get(url, headers=conditional_headers(state))
+        if response.status_code == 304:
+            print(f"Feed {url} not modified since last run")
+            articles = merge_recent_articles([], state.get('articles', []))
+            feed_state.update(url, articles=articles)
+            return articles
+        response.raise_for_status()
+
+        # Entries at or below the previous run's high-water mark were already filtered
+        mark = HighWaterMark(state.get('high_water'))
+        entries = feedparser.parse(response.content).entries[:max_entries]  # Limit to recent articles
+        new_articles = entry_articles(relevant_entries(mark.unseen(entries), matcher), source_label)
+
+        articles = merge_recent_articles(new_articles, state.get('articles', []))
+        feed_state.update(url, etag=response.headers.get('ETag'),
+                          modified=response.headers.get('Last-Modified'),
+                          high_water=mark.newest, articles=articles)
+        return articles
+    except Exception as e:
+        report_source_error(f"Error fetching RSS from {url}: {e}")
+        # Fall back to what the feed gave us last time rather than losing it for this run
+        return merge_recent_articles([], feed_state.get(url).get('articles', []))
+
+# Canonicalize and dedup stages
+
+def canonicalize(articles, redirects=None):
+    """Trim titles, drop untitled articles, strip tracking parameters and resolve Google News redirects"""
+    for article in articles:
+        title = ' '.join((article.get('title') or '').split())
+        if not title:
+            continue
+        # A copy, so the articles cached in feed state keep the links their feed gives
+        article = dict(article, title=title)
+        link = strip_tracking((article.get('link') or '#').strip())
+        if redirects is not None:
+            link = resolve_redirect(link, redirects)
+        article['link'] = link
+        yield article
+
+def drop_seen(articles, seen_items):
+    """Skip articles whose URL or title an earlier run already processed"""
+    for article in articles:
+        if not seen_items.seen(article):
+            yield article
+
+def deduplicate(articles, similarity_threshold=0.85, summary_threshold=None):
+    """Yield articles that are not URL or near-title duplicates, newest version first
+
+    With summary_threshold set, articles whose summaries alone are that similar are dropped too.
+    """
+    near_duplicates = NearDuplicateIndex(similarity_threshold, summary_threshold=summary_threshold)
+    seen_urls = set()
+
+    # Keeping the newest version needs every candidate, so this stage is a barrier
+    for article in sorted(articles, key=lambda x: x.get('date', ''), reverse=True):
+        title = article.get('title', '').strip()
+        normalized_url = canonical_url(article.get('link', ''))
+
+        if not title:
+            continue
+
+        if normalized_url and normalized_url in seen_urls:
+            print(f"Skipping duplicate by URL: '{title[:50]}...'")
+            continue
+
+        # Only articles sharing an LSH bucket are compared, instead of every kept title
+        match = near_duplicates.check_and_add(title, article.get('summary', ''))
+        if match is not None:
+            print(f"Skipping duplicate by {match[1]}: '{title[:50]}...'")
+            continue
+
+        if normalized_url:
+            seen_urls.add(normalized_url)
+        yield article
+
+# Top-K and render stages
+
+def newest(articles, limit):
+    """The limit most recent articles, newest first, without sorting the rest"""
+    return heapq.nlargest(limit, articles, key=lambda x: x.get('date', ''))
+
+def render_key_updates(articles, line_break=''):
+    """Yield markdown for articles grouped under month headings"""
+    current_month = None
+    for article in articles:
+        month_year = datetime.strptime(article['date'], '%Y-%m-%d').strftime('%B %Y')
+        if current_month != month_year:
+            current_month = month_year
+            yield f"\n#### {month_year}\n\n"
+
+        # Use article.get('link') to handle missing links gracefully
+        yield f"**[{article['title']}]({article.get('link', '#')})**{line_break}\n"
+        yield f"*{article['date']} | Source: {article.get('source', 'Unknown')}*\n\n"
+        if article.get('summary'):
+            yield f"{article['summary']}\n\n"
+        yield "---\n\n"
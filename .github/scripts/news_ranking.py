@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+News Relevance Ranking
+BM25 scoring of articles against a CRA query profile, over an in-memory inverted
+index that grows as articles are added, with source-authority and recency boosts
+"""
+
+import heapq
+import math
+import re
+from datetime import datetime
+from fnmatch import fnmatchcase
+
+from article_store import article_fingerprint
+
+# Weighted query terms; bigrams favour the Act itself over generic "EU cybersecurity" coverage
+CRA_QUERY_PROFILE = {
+    'cyber resilience': 3.0,
+    'resilience act': 3.0,
+    'cra': 2.0,
+    'implementing act': 2.0,
+    'delegated act': 2.0,
+    'harmonised standards': 2.0,
+    'conformity assessment': 1.5,
+    'vulnerability handling': 1.5,
+    'reporting obligations': 1.5,
+    'essential requirements': 1.5,
+    'digital elements': 1.5,
+    'annex': 1.0,
+    'manufacturers': 1.0,
+    'enisa': 1.0,
+    'regulation': 0.5,
+    'cybersecurity': 0.5
+}
+
+# Source label globs (lower-case) and their multipliers; the first match wins
+SOURCE_AUTHORITY = [
+    ('eu official', 1.6),
+    ('*europa.eu*', 1.6),
+    ('*eur-lex*', 1.6),
+    ('*enisa*', 1.4),
+    ('google news (euractiv)', 1.2),
+    ('google news (reuters)', 1.1),
+    ('security week', 0.9),
+    ('*securityweek*', 0.9)
+]
+
+STOPWORDS = frozenset('a an and are as at be by for from has in is it of on or the to with'.split())
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+def tokenize(text):
+    """Lower-case word tokens plus adjacent-word bigrams"""
+    words = [word for word in _TOKEN.findall((text or '').lower()) if word not in STOPWORDS]
+    return words, [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+class NewsRanker:
+    """Incrementally built BM25 index over article titles and summaries"""
+
+    def __init__(self, query_profile=CRA_QUERY_PROFILE, source_authority=SOURCE_AUTHORITY,
+                 k1=1.2, b=0.75, title_weight=2, half_life_days=30):
+        self.query_profile = dict(query_profile)
+        self.source_authority = source_authority
+        self.k1 = k1
+        self.b = b
+        self.title_weight = title_weight
+        self.half_life_days = half_life_days
+        self.postings = {}
+        self.doc_lengths = {}
+        self.total_length = 0
+
+    def add(self, article):
+        """Index an article once; returns its document id"""
+        doc_id = article_fingerprint(article)
+        if doc_id in self.doc_lengths:
+            return doc_id
+
+        title_words, title_bigrams = tokenize(article.get('title'))
+        summary_words, summary_bigrams = tokenize(article.get('summary'))
+        # Title terms count title_weight times, as in a simple BM25F
+        terms = (title_words + title_bigrams) * self.title_weight + summary_words + summary_bigrams
+        frequencies = {}
+        for term in terms:
+            if term in self.query_profile:
+                frequencies[term] = frequencies.get(term, 0) + 1
+        # Only query-profile terms are posted; document length still counts every word
+        for term, frequency in frequencies.items():
+            self.postings.setdefault(term, {})[doc_id] = frequency
+        length = len(title_words) * self.title_weight + len(summary_words)
+        self.doc_lengths[doc_id] = length
+        self.total_length += length
+        return doc_id
+
+    def bm25_scores(self):
+        """BM25 score of every indexed document with at least one query term"""
+        count = len(self.doc_lengths)
+        if not count:
+            return {}
+        average_length = self.total_length / count or 1
+        scores = {}
+        for term, weight in self.query_profile.items():
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, frequency in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight * idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return scores
+
+    def authority(self, source):
+        """Multiplier for an article's source label"""
+        source = (source or '').lower()
+        for pattern, boost in self.source_authority:
+            if fnmatchcase(source, pattern):
+                return boost
+        return 1.0
+
+    def recency(self, date, today):
+        """Exponential decay by article age"""
+        try:
+            age_days = max(0, (today - datetime.strptime(date, '%Y-%m-%d')).days)
+        except (TypeError, ValueError):
+            return 0.5
+        return 0.5 ** (age_days / self.half_life_days) if self.half_life_days else 1.0
+
+    def top(self, articles, limit=10):
+        """The highest-scoring articles, returned newest first"""
+        doc_ids = [self.add(article) for article in articles]
+        scores = self.bm25_scores()
+        today = datetime.now()
+        ranked = heapq.nlargest(limit, range(len(articles)), key=lambda i: (
+            scores.get(doc_ids[i], 0.0) * self.authority(articles[i].get('source'))
+            * self.recency(articles[i].get('date'), today),
+            articles[i].get('date', '')))
+        return sorted((articles[i] for i in ranked), key=lambda x: x.get('date', ''), reverse=True)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+News Source State
+Per-source state persisted between news runs (HTTP validators, high-water marks,
+last relevant articles)
+"""
+
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+# Restored between workflow runs by the Actions cache; override for local experiments
+STATE_DIRECTORY = os.environ.get('CRA_NEWS_STATE_DIR', '.cache/cra-news')
+
+class SourceStateStore:
+    """JSON-backed dictionary of per-source state, safe to share between threads"""
+
+    def __init__(self, filename, directory=None):
+        self.path = os.path.join(directory or STATE_DIRECTORY, filename)
+        self.sources = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Read state written by the previous run"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.sources = json.load(f).get('sources', {})
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable state file {self.path}: {e}")
+            self.sources = {}
+
+    def get(self, key):
+        """Return a copy of the stored state for a source"""
+        with self._lock:
+            return dict(self.sources.get(key, {}))
+
+    def update(self, key, **values):
+        """Merge values into a source's state"""
+        with self._lock:
+            state = self.sources.setdefault(key, {})
+            state.update(values)
+            state['last_checked'] = datetime.now().isoformat()
+
+    def merge(self, sources):
+        """Adopt entries that another process updated more recently"""
+        with self._lock:
+            for key, state in sources.items():
+                if state.get('last_checked', '') > self.sources.get(key, {}).get('last_checked', ''):
+                    self.sources[key] = state
+
+    def save(self):
+        """Write the state atomically"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with self._lock:
+            data = {'version': 1, 'sources': self.sources}
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+def conditional_headers(state):
+    """If-None-Match/If-Modified-Since headers from stored validators"""
+    headers = {}
+    if state.get('etag'):
+        headers['If-None-Match'] = state['etag']
+    if state.get('modified'):
+        headers['If-Modified-Since'] = state['modified']
+    return headers
+
+def merge_recent_articles(new_articles, cached_articles, days=30):
+    """Combine newly parsed and cached articles, dropping repeats by link and anything too old"""
+    cutoff = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+    merged = []
+    seen_links = set()
+    for article in list(new_articles) + list(cached_articles):
+        if article.get('date', '') < cutoff or article.get('link') in seen_links:
+            continue
+        seen_links.add(article.get('link'))
+        merged.append(article)
+    return merged
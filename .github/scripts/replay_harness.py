@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+HTTP Record/Replay Harness
+Cassette recording and replay for the shared HTTP session, plus a local stand-in
+server that can inject latency, 304s, 429s and slow bodies
+
+Record real responses while running any script normally:
+    CRA_HTTP_CASSETTE=cassettes/news.json CRA_HTTP_MODE=record python .github/scripts/update_wiki_news.py
+Replay them later without network access:
+    CRA_HTTP_CASSETTE=cassettes/news.json python .github/scripts/update_wiki_news.py
+"""
+
+import atexit
+import base64
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from urllib3.response import HTTPResponse
+
+import http_client
+
+# Headers that describe the wire encoding rather than the recorded (decoded) body
+HOP_BY_HOP_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length', 'connection', 'keep-alive'}
+
+# Request headers dropped while recording so the cassette always holds full bodies
+CONDITIONAL_HEADERS = ('If-None-Match', 'If-Modified-Since', 'Range', 'If-Range')
+
+class Cassette:
+    """Recorded HTTP interactions keyed by method and URL"""
+
+    def __init__(self, path):
+        self.path = path
+        self.interactions = {}
+        self._cursor = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Read the cassette file if it exists"""
+        if not os.path.exists(self.path):
+            return self
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        for interaction in data.get('interactions', []):
+            interaction['body'] = base64.b64decode(interaction.pop('body_b64', ''))
+            key = (interaction['method'], interaction['url'])
+            self.interactions.setdefault(key, []).append(interaction)
+        return self
+
+    def save(self):
+        """Write all interactions back to the cassette file"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            interactions = [dict({k: v for k, v in interaction.items() if k != 'body'},
+                                 body_b64=base64.b64encode(interaction['body']).decode('ascii'))
+                            for recorded in self.interactions.values() for interaction in recorded]
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'interactions': interactions}, f, indent=2)
+
+    def record(self, method, url, status, headers, body):
+        """Add an interaction"""
+        interaction = {
+            'method': method,
+            'url': url,
+            'status': status,
+            'headers': {k: v for k, v in headers.items() if k.lower() not in HOP_BY_HOP_HEADERS},
+            'body': body,
+            'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        }
+        with self._lock:
+            self.interactions.setdefault((method, url), []).append(interaction)
+        return interaction
+
+    def next(self, method, url):
+        """Return the next recorded interaction for a request, repeating the last one"""
+        with self._lock:
+            recorded = self.interactions.get((method, url))
+            if not recorded:
+                return None
+            index = self._cursor.get((method, url), 0)
+            self._cursor[(method, url)] = index + 1
+            return recorded[min(index, len(recorded) - 1)]
+
+def build_replay_response(adapter, request, interaction):
+    """Turn a recorded interaction into a response, honouring conditional and Range headers"""
+    status = interaction['status']
+    headers = dict(interaction['headers'])
+    body = interaction['body']
+
+    etag = headers.get('ETag') or headers.get('etag')
+    if status == 200 and etag and request.headers.get('If-None-Match') == etag:
+        status, body = 304, b''
+    elif status == 200 and request.headers.get('Range', '').startswith('bytes='):
+        start = int(request.headers['Range'][6:].split('-')[0] or 0)
+        if start < len(body):
+            headers['Content-Range'] = f"bytes {start}-{len(body) - 1}/{len(body)}"
+            status, body = 206, body[start:]
+    headers['Content-Length'] = str(len(body))
+
+    raw = HTTPResponse(body=io.BytesIO(body), headers=headers, status=status,
+                       preload_content=False, decode_content=False, request_url=request.url)
+    return HTTPAdapter.build_response(adapter, request, raw)
+
+class ReplayAdapter(BaseAdapter):
+    """Transport adapter that answers every request from a cassette"""
+    records = False
+
+    def __init__(self, cassette):
+        super().__init__()
+        self.cassette = cassette
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        interaction = self.cassette.next(request.method, request.url)
+        if interaction is None:
+            raise requests.ConnectionError(f"No recorded response for {request.method} {request.url}")
+        return build_replay_response(self, request, interaction)
+
+    def close(self):
+        pass
+
+class RecordingAdapter(http_client.TimedHTTPAdapter):
+    """Transport adapter that performs real requests and records full responses"""
+    records = True
+
+    def __init__(self, cassette, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+
+    def send(self, request, stream=False, **kwargs):
+        for header in CONDITIONAL_HEADERS:
+            request.headers.pop(header, None)
+        response = super().send(request, stream=True, **kwargs)
+        interaction = self.cassette.record(request.method, request.url, response.status_code,
+                                           response.headers, response.content)
+        return build_replay_response(self, request, interaction)
+
+def install(fetcher, cassette, mode):
+    """Mount a record or replay adapter on a fetcher's session"""
+    if mode == 'record':
+        adapter = RecordingAdapter(cassette, pool_connections=http_client.POOL_CONNECTIONS,
+                                   pool_maxsize=http_client.POOL_MAXSIZE, max_retries=0)
+    else:
+        adapter = ReplayAdapter(cassette)
+    fetcher.session.mount('https://', adapter)
+    fetcher.session.mount('http://', adapter)
+
+def install_from_environment(fetcher):
+    """Apply CRA_HTTP_CASSETTE / CRA_HTTP_MODE (record or replay) to a fetcher"""
+    path = os.environ['CRA_HTTP_CASSETTE']
+    mode = os.environ.get('CRA_HTTP_MODE', 'replay')
+    cassette = Cassette(path).load()
+    install(fetcher, cassette, mode)
+    if mode == 'record':
+        atexit.register(cassette.save)
+    print(f"HTTP {mode} mode using cassette {path}")
+
+@contextmanager
+def use_cassette(path, mode='replay', fetcher=None):
+    """Temporarily record to or replay from a cassette on the shared fetcher"""
+    fetcher = fetcher or http_client.default_fetcher
+    cassette = Cassette(path).load()
+    original = fetcher.session
+    fetcher.session = http_client.build_session()
+    install(fetcher, cassette, mode)
+    try:
+        yield cassette
+    finally:
+        fetcher.session.close()
+        fetcher.session = original
+        if mode == 'record':
+            cassette.save()
+
+class Route:
+    """A stand-in server resource with optional fault injection"""
+
+    def __init__(self, body, content_type='application/octet-stream', latency=0.0, fail_first=0,
+                 fail_status=503, retry_after=None, bytes_per_second=None, etag=True):
+        self.body = body
+        self.content_type = content_type
+        self.latency = latency
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.retry_after = retry_after
+        self.bytes_per_second = bytes_per_second
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"' if etag else None
+        self.hits = 0
+
+class StandInServer:
+    """Local HTTP server standing in for the EU sites, SecurityWeek and other sources"""
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.routes = {}
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                server._handle(self)
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, path):
+        return self.base_url + path
+
+    def add_route(self, path, body, **options):
+        """Serve body at path; options are passed to Route"""
+        self.routes[path] = Route(body, **options)
+        return self.url(path)
+
+    def add_cassette(self, cassette):
+        """Serve every interaction of a cassette under /<host><path>"""
+        urls = {}
+        for (method, url), recorded in cassette.interactions.items():
+            interaction = recorded[-1]
+            path = '/' + url.split('://', 1)[-1]
+            content_type = interaction['headers'].get('Content-Type', 'application/octet-stream')
+            urls[url] = self.add_route(path, interaction['body'], content_type=content_type)
+        return urls
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _handle(self, handler):
+        route = self.routes.get(handler.path)
+        if route is None:
+            self._send(handler, 404, {}, b'')
+            return
+
+        with self._lock:
+            route.hits += 1
+            hit = route.hits
+        if route.latency:
+            time.sleep(route.latency)
+
+        if hit <= route.fail_first:
+            headers = {'Retry-After': str(route.retry_after)} if route.retry_after is not None else {}
+            self._send(handler, route.fail_status, headers, b'')
+            return
+
+        headers = {'Content-Type': route.content_type}
+        if route.etag:
+            headers['ETag'] = route.etag
+            if handler.headers.get('If-None-Match') == route.etag:
+                self._send(handler, 304, headers, b'')
+                return
+
+        body = route.body
+        status = 200
+        range_header = handler.headers.get('Range', '')
+        if range_header.startswith('bytes='):
+            start = int(range_header[6:].split('-')[0] or 0)
+            if start < len(body):
+                headers['Content-Range'] = f"bytes {start}-{len(body) - 1}/{len(body)}"
+                status, body = 206, body[start:]
+        self._send(handler, status, headers, body, route.bytes_per_second)
+
+    def _send(self, handler, status, headers, body, bytes_per_second=None):
+        handler.send_response(status)
+        for key, value in headers.items():
+            handler.send_header(key, value)
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        if not bytes_per_second:
+            handler.wfile.write(body)
+            return
+        # Trickle the body out in ~10 slices per second to simulate a slow server
+        step = max(1, bytes_per_second // 10)
+        for offset in range(0, len(body), step):
+            handler.wfile.write(body[offset:offset + step])
+            handler.wfile.flush()
+            time.sleep(0.1)
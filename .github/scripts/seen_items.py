@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Seen News Items
+Scalable Bloom filter over canonical URLs and title fingerprints of articles
+processed by earlier runs, kept in a small binary state file
+"""
+
+import hashlib
+import math
+import os
+import struct
+
+from article_store import canonical_url
+from near_duplicates import normalize_text
+from news_state import STATE_DIRECTORY
+
+_MAGIC = b'CRASEEN1'
+_HEADER = struct.Struct('<8sI')
+_FILTER_HEADER = struct.Struct('<QdQQI')
+
+class BloomFilter:
+    """Fixed-capacity Bloom filter using double hashing"""
+
+    def __init__(self, capacity, error_rate, bits=None, count=0):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = bits if bits is not None else bytearray((self.num_bits + 7) // 8)
+        self.count = count
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        first, second = struct.unpack('<QQ', digest)
+        for i in range(self.num_hashes):
+            yield (first + i * second) % self.num_bits
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def add(self, key):
+        """Set the key's bits; returns False if it was (probably) already present"""
+        added = False
+        for position in self._positions(key):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+class SeenItems:
+    """Chain of Bloom filters that grows as items are added, keeping the overall error rate bounded"""
+
+    def __init__(self, filename='seen-items.bloom', directory=None, initial_capacity=10000,
+                 error_rate=0.001, growth=2, tightening=0.5):
+        self.path = os.path.join(directory or STATE_DIRECTORY, filename)
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.growth = growth
+        self.tightening = tightening
+        self.filters = []
+        self.load()
+
+    def load(self):
+        """Read the filters written by the previous run"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+            magic, count = _HEADER.unpack_from(data, 0)
+            if magic != _MAGIC:
+                raise ValueError('unknown file format')
+            offset = _HEADER.size
+            filters = []
+            for _ in range(count):
+                capacity, error_rate, num_bits, items, num_hashes = _FILTER_HEADER.unpack_from(data, offset)
+                offset += _FILTER_HEADER.size
+                size = (num_bits + 7) // 8
+                bloom = BloomFilter(capacity, error_rate, bytearray(data[offset:offset + size]), items)
+                if bloom.num_bits != num_bits or bloom.num_hashes != num_hashes or len(bloom.bits) != size:
+                    raise ValueError('inconsistent filter parameters')
+                offset += size
+                filters.append(bloom)
+            self.filters = filters
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Ignoring unreadable seen-items file {self.path}: {e}")
+            self.filters = []
+
+    def save(self):
+        """Write the filters atomically"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, len(self.filters)))
+            for bloom in self.filters:
+                f.write(_FILTER_HEADER.pack(bloom.capacity, bloom.error_rate, bloom.num_bits,
+                                            bloom.count, bloom.num_hashes))
+                f.write(bloom.bits)
+        os.replace(tmp_path, self.path)
+
+    def __contains__(self, key):
+        return any(key in bloom for bloom in self.filters)
+
+    def add(self, key):
+        """Record a key, starting a larger and stricter filter once the current one is full"""
+        if key in self:
+            return False
+        if not self.filters or self.filters[-1].count >= self.filters[-1].capacity:
+            level = len(self.filters)
+            self.filters.append(BloomFilter(self.initial_capacity * self.growth ** level,
+                                            self.error_rate * (1 - self.tightening) * self.tightening ** level))
+        return self.filters[-1].add(key)
+
+    @staticmethod
+    def article_keys(article):
+        """The canonical URL and title fingerprint an article is remembered by"""
+        keys = []
+        url = canonical_url(article.get('link'))
+        if url:
+            keys.append('u:' + url)
+        title = normalize_text(article.get('title'))
+        if title:
+            keys.append('t:' + title)
+        return keys
+
+    def seen(self, article):
+        """Whether an earlier run already processed the article's URL or exact title"""
+        return any(key in self for key in self.article_keys(article))
+
+    def add_article(self, article):
+        """Remember an article's URL and title"""
+        for key in self.article_keys(article):
+            self.add(key)
+
+    def __len__(self):
+        return sum(bloom.count for bloom in self.filters)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+News Source Health
+Per-source fetch statistics kept between runs, used to honour each source's
+schedule and to back off sources that keep failing
+"""
+
+from datetime import datetime, timedelta
+
+from news_state import SourceStateStore
+
+class SourceHealth:
+    """Attempts, failures and timings per catalog source, with exponential backoff"""
+
+    def __init__(self, filename, directory=None, backoff_base_hours=12, backoff_max_days=7,
+                 failures_before_backoff=2, schedule_slack=0.9):
+        self.store = SourceStateStore(filename, directory)
+        # Twice the 6-hourly workflow interval, so the first backoff really skips a run
+        self.backoff_base = timedelta(hours=backoff_base_hours)
+        self.backoff_max = timedelta(days=backoff_max_days)
+        self.failures_before_backoff = failures_before_backoff
+        # Scheduled runs start a few minutes early or late; a source is due slightly before its interval
+        self.schedule_slack = schedule_slack
+
+    def backoff(self, consecutive_failures):
+        """Extra wait after repeated failures: the base, doubled for each further failure"""
+        if consecutive_failures < self.failures_before_backoff:
+            return timedelta(0)
+        doublings = consecutive_failures - self.failures_before_backoff
+        return min(self.backoff_max, self.backoff_base * 2 ** min(doublings, 16))
+
+    def next_attempt(self, name, schedule=0):
+        """When a source should next be fetched, or None if it is due now"""
+        state = self.store.get(name)
+        if not state.get('last_attempt'):
+            return None
+        # The slack only loosens the schedule; backoff waits are kept in full
+        wait = max(timedelta(seconds=schedule or 0) * self.schedule_slack,
+                   self.backoff(state.get('consecutive_failures', 0)))
+        return datetime.fromisoformat(state['last_attempt']) + wait
+
+    def due_sources(self, sources, now=None):
+        """The (name, config) pairs whose schedule and backoff allow a fetch this run"""
+        now = now or datetime.now()
+        due = []
+        for name, config in sources:
+            next_attempt = self.next_attempt(name, config.get('schedule', 0))
+            if next_attempt is None or next_attempt <= now:
+                due.append((name, config))
+                continue
+            failures = self.store.get(name).get('consecutive_failures', 0)
+            reason = f"backing off after {failures} failures" if failures >= self.failures_before_backoff \
+                else "not scheduled"
+            print(f"Skipping {name}: {reason} until {next_attempt.strftime('%Y-%m-%d %H:%M')}")
+        return due
+
+    def record(self, name, error=None, duration=0.0, articles=0):
+        """Add one fetch outcome to a source's statistics"""
+        state = self.store.get(name)
+        now = datetime.now().isoformat()
+        duration_ms = round(duration * 1000, 1)
+        values = {
+            'attempts': state.get('attempts', 0) + 1,
+            'failures': state.get('failures', 0) + (1 if error else 0),
+            'consecutive_failures': state.get('consecutive_failures', 0) + 1 if error else 0,
+            'last_attempt': now,
+            # Moving average so one slow response does not dominate
+            'avg_ms': round(0.7 * state['avg_ms'] + 0.3 * duration_ms, 1) if 'avg_ms' in state else duration_ms,
+            'last_articles': articles
+        }
+        if error:
+            values.update(last_failure=now, last_error=str(error)[:300])
+        else:
+            values.update(last_success=now, last_error=None)
+        self.store.update(name, **values)
+
+    def report(self):
+        """Print the sources currently failing, worst first"""
+        failing = sorted(((name, state) for name, state in self.store.sources.items()
+                          if state.get('consecutive_failures')),
+                         key=lambda item: -item[1]['consecutive_failures'])
+        for name, state in failing:
+            print(f"Source {name} failed {state['consecutive_failures']} run(s) in a row: {state.get('last_error')}")
+
+    def save(self):
+        """Write the statistics atomically"""
+        self.store.save()
@@ -4,183 +4,116 @@ Wiki News Updater
 Updates GitHub Wiki with the latest CRA news instead of creating repository files
 """
 
-import requests
 import json
-import feedparser
 from datetime import datetime, timedelta
 import os
-import time
+
+from article_store import ArticleStore
+from canonical_urls import RedirectCache
+from feed_catalog import DEFAULT_FEED_CATALOG_FILE, FeedCatalog
+from gnews_source import (GNEWS_PERIOD, KeywordResponseCache, PublishedDateParser, fetch_keyword_results,
+                          merge_keyword_results, search_gnews)
+from keyword_matcher import cra_keywords
+from news_pipeline import (canonicalize, deduplicate, drop_seen, fetch_rss_articles, fetch_sharded,
+                           render_key_updates, report_source_error, shard_count, truncate_summary)
+from news_ranking import NewsRanker
+from news_state import SourceStateStore
+from seen_items import SeenItems
+from source_health import SourceHealth
+
+# Relevance keywords and weights; the CRA's name counts in every EU language
+RSS_KEYWORDS = cra_keywords({'cra': 1.0, 'eu cybersecurity': 1.0})
 
 class WikiNewsUpdater:
-    def __init__(self):
+    def __init__(self, max_workers=8, similarity_threshold=0.85, catalog_file=DEFAULT_FEED_CATALOG_FILE, processes=None):
         self.github_token = os.environ.get('GITHUB_TOKEN')
         self.repo_owner = 'seedon198'
         self.repo_name = 'Cyber-Resilience-Act'
         self.wiki_page = 'Latest-News'
         
-        self.news_sources = {
-            'eu_official': {
-                'url': 'https://ec.europa.eu/info/law/better-regulation/have-your-say/initiatives/13410-Cyber-resilience-act_en',
-                'type': 'web'
-            },
-            'enisa_news': {
-                'url': 'https://www.enisa.europa.eu/news',
-                'type': 'web'
-            },
-            'cybersecurity_news': {
-                'url': 'https://feeds.feedburner.com/SecurityWeek',
-                'type': 'rss'
-            },
-            'gnews': {
-                'type': 'gnews',
-                'keywords': ['cyber resilience act', 'CRA', 'EU cybersecurity', 'cyber resilience act EU']
-            }
-        }
+        # Sources with their schedules and priorities; the wiki uses feeds and Google News
+        self.news_sources = FeedCatalog.load(catalog_file).select(('rss', 'gnews'))
+        
+        # Sources and GNews keywords are fetched concurrently; per-host limits live in http_client
+        self.max_workers = max(1, max_workers)
+        
+        # Large catalogs are split across worker processes, each fetching with max_workers threads
+        self.processes = processes or shard_count(len(self.news_sources))
+        
+        # Per-source fetch statistics; sources that keep failing are polled less often
+        self.source_health = SourceHealth('wiki-source-health.json')
+        
+        # Titles more similar than this (SequenceMatcher ratio) are treated as duplicates
+        self.similarity_threshold = similarity_threshold
+        
+        # Feed validators, high-water marks and last relevant articles from previous runs
+        self.feed_state = SourceStateStore('wiki-feeds.json')
         
-    def fetch_rss_news(self, url, keywords=['cyber resilience act', 'cra', 'eu cybersecurity']):
+        # GNews results per keyword, reused across runs within their TTL
+        self.gnews_cache = KeywordResponseCache('gnews-responses.json')
+        self.date_parser = PublishedDateParser()
+        
+        # Google News links resolved to publisher URLs by earlier runs
+        self.redirects = RedirectCache('redirects.json')
+        
+        # Full article history; the last 30 days are merged into each run before deduplication
+        self.article_store = ArticleStore('wiki-articles.sqlite3')
+        self.history_limit = 100
+        self.history_days = 30
+        
+        # Compact record of every item already processed, so reruns skip them up front
+        self.seen_items = SeenItems('wiki-seen.bloom')
+        
+        # BM25 index used to choose the "Key Updates"; grows as articles are rendered
+        self.ranker = NewsRanker()
+        
+    def fetch_rss_news(self, url, keywords=RSS_KEYWORDS, source_label='Security Week'):
         """Fetch news from RSS feeds"""
-        try:
-            feed = feedparser.parse(url)
-            relevant_articles = []
-            
-            for entry in feed.entries[:20]:
-                title = entry.title.lower()
-                summary = entry.get('summary', '').lower()
-                
-                if any(keyword in title or keyword in summary for keyword in keywords):
-                    article_date = datetime(*entry.published_parsed[:6]) if hasattr(entry, 'published_parsed') else datetime.now()
-                    
-                    if article_date > datetime.now() - timedelta(days=30):
-                        relevant_articles.append({
-                            'title': entry.title,
-                            'link': entry.link,
-                            'date': article_date.strftime('%Y-%m-%d'),
-                            'summary': entry.get('summary', '')[:200] + '...' if len(entry.get('summary', '')) > 200 else entry.get('summary', ''),
-                            'source': 'Security Week'
-                        })
-                        
-            return relevant_articles
-        except Exception as e:
-            print(f"Error fetching RSS from {url}: {e}")
-            return []
+        return fetch_rss_articles(url, self.feed_state, keywords, source_label)
     
     def fetch_gnews_articles(self, keywords, max_results=10):
-        """Fetch news from Google News using gnews library"""
+        """Fetch news from Google News RSS search"""
         try:
-            from gnews import GNews
+            def fetch_keyword(keyword):
+                print(f"Fetching from GNews for keyword: {keyword}")
+                return search_gnews(keyword, GNEWS_PERIOD, max_results)  # Last 30 days
             
-            gnews = GNews(
-                language='en',
-                country='US',
-                period='30d',  # Last 30 days
-                max_results=max_results
-            )
+            keyword_results = fetch_keyword_results(keywords, fetch_keyword, self.gnews_cache,
+                                                    GNEWS_PERIOD, self.max_workers)
             
             relevant_articles = []
+            cutoff = datetime.now() - timedelta(days=30)
             
-            for keyword in keywords:
-                print(f"Fetching from GNews for keyword: {keyword}")
+            # Keywords overlap heavily; repeats are dropped before any date parsing
+            for item in merge_keyword_results(keyword_results):
                 try:
-                    news_items = gnews.get_news(keyword)
+                    publisher = (item.get('publisher') or {}).get('title', 'Unknown')
+                    # GNews returns dates in various formats; fall back to the current date
+                    article_date = self.date_parser.parse(item.get('published date'), publisher) or datetime.now()
                     
-                    for item in news_items:
-                        # Parse the published date
-                        try:
-                            # GNews returns dates in various formats, try to parse
-                            if 'published date' in item:
-                                published_str = item['published date']
-                                # Try different date formats
-                                for date_format in ['%a, %d %b %Y %H:%M:%S %Z', '%Y-%m-%d', '%d %b %Y']:
-                                    try:
-                                        article_date = datetime.strptime(published_str, date_format)
-                                        break
-                                    except ValueError:
-                                        continue
-                                else:
-                                    # If no format works, use current date
-                                    article_date = datetime.now()
-                            else:
-                                article_date = datetime.now()
-                        except:
-                            article_date = datetime.now()
+                    # Filter for recent articles (last 30 days)
+                    if article_date > cutoff:
+                        relevant_articles.append({
+                            'title': item.get('title', 'No Title'),
+                            'link': item.get('url', '#'),
+                            'date': article_date.strftime('%Y-%m-%d'),
+                            'summary': truncate_summary(item.get('description', '')),
+                            'source': f"Google News ({publisher})"
+                        })
                         
-                        # Filter for recent articles (last 30 days)
-                        if article_date > datetime.now() - timedelta(days=30):
-                            relevant_articles.append({
-                                'title': item.get('title', 'No Title'),
-                                'link': item.get('url', '#'),
-                                'date': article_date.strftime('%Y-%m-%d'),
-                                'summary': item.get('description', '')[:200] + '...' if len(item.get('description', '')) > 200 else item.get('description', ''),
-                                'source': f"Google News ({item.get('publisher', {}).get('title', 'Unknown')})"
-                            })
-                            
                 except Exception as e:
-                    print(f"Error fetching from GNews for keyword '{keyword}': {e}")
+                    print(f"Error processing GNews results: {e}")
                     continue
                     
             return relevant_articles
             
-        except ImportError:
-            print("GNews library not available, skipping Google News")
-            return []
         except Exception as e:
-            print(f"Error fetching from GNews: {e}")
+            report_source_error(f"Error fetching from GNews: {e}")
             return []
 
     def deduplicate_articles(self, articles):
-        """Remove duplicate articles based on title similarity and URL"""
-        from difflib import SequenceMatcher
-        from urllib.parse import urlparse
-        
-        def similarity(a, b):
-            return SequenceMatcher(None, a.lower(), b.lower()).ratio()
-        
-        def normalize_url(url):
-            """Normalize URL for comparison"""
-            if not url or url == '#':
-                return None
-            parsed = urlparse(url)
-            return f"{parsed.netloc}{parsed.path}".lower()
-        
-        deduplicated = []
-        seen_titles = []
-        seen_urls = []
-        
-        # Sort by date to keep the newest version of duplicates
-        articles.sort(key=lambda x: x.get('date', ''), reverse=True)
-        
-        for article in articles:
-            title = article.get('title', '').strip()
-            url = article.get('link', '')
-            normalized_url = normalize_url(url)
-            
-            if not title:
-                continue
-                
-            # Check if this title is too similar to any we've already seen
-            is_duplicate = False
-            
-            # Check title similarity
-            for seen_title in seen_titles:
-                if similarity(title, seen_title) > 0.85:  # 85% similarity threshold
-                    print(f"Skipping duplicate by title: '{title[:50]}...'")
-                    is_duplicate = True
-                    break
-            
-            # Check URL similarity (if URLs exist)
-            if not is_duplicate and normalized_url:
-                for seen_url in seen_urls:
-                    if normalized_url == seen_url:
-                        print(f"Skipping duplicate by URL: '{title[:50]}...'")
-                        is_duplicate = True
-                        break
-            
-            if not is_duplicate:
-                deduplicated.append(article)
-                seen_titles.append(title)
-                if normalized_url:
-                    seen_urls.append(normalized_url)
-        
+        """Remove duplicate articles based on title/summary similarity and URL"""
+        deduplicated = list(deduplicate(articles, self.similarity_threshold))
         print(f"Removed {len(articles) - len(deduplicated)} duplicate articles")
         return deduplicated
 
@@ -196,9 +129,6 @@ class WikiNewsUpdater:
                     'link': 'https://ec.europa.eu/info/law/better-regulation/have-your-say/initiatives/13410-Cyber-resilience-act_en'
                 }
             ]
-            
-        # Sort articles by date (newest first)
-        articles.sort(key=lambda x: x['date'], reverse=True)
         
         wiki_content = f"""# Latest CRA News and Updates
 
@@ -212,24 +142,8 @@ The following section is automatically updated with the latest news and developm
 
 """
         
-        current_month = None
-        for article in articles[:10]:
-            article_date = datetime.strptime(article['date'], '%Y-%m-%d')
-            month_year = article_date.strftime('%B %Y')
-            
-            if current_month != month_year:
-                current_month = month_year
-                wiki_content += f"\n#### {month_year}\n\n"
-            
-            # Use article.get('link') to handle missing links gracefully
-            article_link = article.get('link', '#')
-            wiki_content += f"**[{article['title']}]({article_link})**  \n"
-            wiki_content += f"*{article['date']} | Source: {article.get('source', 'Unknown')}*\n\n"
-            
-            if article.get('summary'):
-                wiki_content += f"{article['summary']}\n\n"
-            
-            wiki_content += "---\n\n"
+        # The most relevant items, still listed newest first under their month headings
+        wiki_content += ''.join(render_key_updates(self.ranker.top(articles, limit=10), line_break='  '))
         
         wiki_content += f"""
 ## Monitoring Sources
@@ -312,29 +226,51 @@ Latest developments automatically inform updates to:
                     print(f"   Error details: {e.stderr}")
                 return False
     
+    def fetch_source(self, source):
+        """Fetch articles from one (source_name, source_config) entry"""
+        source_name, source_config = source
+        print(f"Fetching from {source_name}...")
+        
+        if source_config['type'] == 'rss':
+            return self.fetch_rss_news(source_config['url'], source_label=source_config.get('title', 'Security Week'))
+        elif source_config['type'] == 'gnews':
+            return self.fetch_gnews_articles(source_config['keywords'])
+        return []
+    
     def run(self):
         """Main execution function"""
         print("Starting CRA news wiki update...")
-        all_articles = []
         
-        for source_name, source_config in self.news_sources.items():
-            print(f"Fetching from {source_name}...")
-            
-            if source_config['type'] == 'rss':
-                articles = self.fetch_rss_news(source_config['url'])
-                all_articles.extend(articles)
-            elif source_config['type'] == 'gnews':
-                articles = self.fetch_gnews_articles(source_config['keywords'])
-                all_articles.extend(articles)
-            
-            time.sleep(1)  # Be respectful to servers
+        # All sources run at once; the combined list is ready when the slowest one finishes
+        sources = self.source_health.due_sources(self.news_sources.items())
+        fetched = list(canonicalize(fetch_sharded(sources, self.fetch_source, self.max_workers, self.processes,
+                                                  self.source_health, (self.feed_state, self.gnews_cache.store)),
+                                    self.redirects))
+        self.feed_state.save()
+        self.gnews_cache.save()
+        self.redirects.save()
+        self.source_health.save()
+        self.source_health.report()
         
-        print(f"Found {len(all_articles)} relevant articles")
+        # Items processed by earlier runs are already in the article store; only new ones go further
+        new_articles = list(drop_seen(fetched, self.seen_items))
+        print(f"Found {len(fetched)} relevant articles, {len(new_articles)} not seen in earlier runs")
         
-        # Remove duplicates
-        all_articles = self.deduplicate_articles(all_articles)
+        # Remove duplicates, including repeats of articles stored by earlier runs
+        # Only the rendered view is limited to recent news; the store keeps everything
+        since = (datetime.now() - timedelta(days=self.history_days)).strftime('%Y-%m-%d')
+        history = self.article_store.query(limit=self.history_limit, since=since)
+        all_articles = self.deduplicate_articles(new_articles + history)
         print(f"After deduplication: {len(all_articles)} unique articles")
         
+        inserted, updated = self.article_store.upsert(all_articles)
+        print(f"Article store: {inserted} new, {updated} changed, {self.article_store.count()} total")
+        self.article_store.close()
+        
+        for article in new_articles:
+            self.seen_items.add_article(article)
+        self.seen_items.save()
+        
         # Generate and update wiki content
         wiki_content = self.generate_wiki_content(all_articles)
         success = self.update_wiki_page(wiki_content)